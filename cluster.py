@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Oyasumi Discord Bot - Cluster Launcher
+Runs the bot as several worker processes, each owning a range of shards.
+Use this instead of run.py once one event loop can no longer keep up.
+
+Configuration (.env):
+    CLUSTER_WORKERS  Number of worker processes (default: CPU count)
+    SHARD_COUNT      Total shards (default: Discord's recommendation)
+"""
+
+import time
+process_started = time.perf_counter()  # Start of each worker's startup report clock (spawn re-runs this module)
+
+import os
+import sys
+import math
+import asyncio
+import secrets
+import multiprocessing
+from pathlib import Path
+
+# Add the src directory to the Python path
+src_path = Path(__file__).parent / "src"
+sys.path.insert(0, str(src_path))
+
+# Change to src directory for relative imports
+os.chdir(src_path)
+
+import aiohttp
+from dotenv import load_dotenv
+from utils.ipc import ClusterHub
+
+RESTART_DELAY = 5  # Seconds before starting a worker that crashed or asked to restart
+IDENTIFY_INTERVAL = 5  # Seconds Discord requires between IDENTIFYs in one concurrency bucket
+
+
+def run_worker(worker_id, shard_ids, shard_count, ipc_port, ipc_secret):
+    """Worker process entry point"""
+    # One log and trace file per worker: several processes writing the same file would clobber it
+    for variable, default in (("LOG_FILE", "bot.log"), ("TRACE_FILE", "traces.json")):
+        path = os.getenv(variable, default)
+        if path:  # Empty disables the file
+            path = Path(path)
+            os.environ[variable] = str(path.with_name(f"{path.stem}.worker{worker_id}{path.suffix}"))
+
+    # Imported here so the launcher itself never loads discord.py or the cogs
+    from utils.profiler import mark_process_start
+    mark_process_start(process_started)
+    from bot import run_worker as run_bot_worker
+    from utils.log import stop_logging
+
+    try:
+        exit_code = asyncio.run(run_bot_worker(worker_id, shard_ids, shard_count, ipc_port, ipc_secret))
+    except KeyboardInterrupt:
+        exit_code = 0
+    finally:
+        stop_logging()  # Write out queued records before the worker process exits
+    sys.exit(exit_code)
+
+
+async def fetch_gateway_info(token):
+    """Get Discord's recommended shard count and identify concurrency"""
+    async with aiohttp.ClientSession() as session:
+        async with session.get(
+            "https://discord.com/api/v10/gateway/bot",
+            headers={"Authorization": f"Bot {token}"}
+        ) as response:
+            response.raise_for_status()
+            data = await response.json()
+            return data["shards"], data["session_start_limit"]["max_concurrency"]
+
+
+def split_shards(shard_count, worker_count):
+    """Split shard ids into contiguous, evenly sized ranges"""
+    per_worker, extra = divmod(shard_count, worker_count)
+    ranges = []
+    start = 0
+    for worker_id in range(worker_count):
+        size = per_worker + (1 if worker_id < extra else 0)
+        ranges.append(list(range(start, start + size)))
+        start += size
+    return ranges
+
+
+async def main():
+    """Start the IPC hub and supervise the worker processes"""
+    load_dotenv()
+    token = os.getenv("TOKEN")
+    if not token:
+        raise ValueError("TOKEN must be set in .env file")
+
+    recommended, max_concurrency = await fetch_gateway_info(token)
+    shard_count = int(os.getenv("SHARD_COUNT") or recommended)
+    worker_count = max(1, min(int(os.getenv("CLUSTER_WORKERS") or os.cpu_count() or 1), shard_count))
+    shard_ranges = split_shards(shard_count, worker_count)
+
+    secret = secrets.token_hex(16)
+    hub = ClusterHub(secret)
+    ipc_port = await hub.start()
+
+    print(f"Running {shard_count} shards across {worker_count} workers (IPC on 127.0.0.1:{ipc_port})")
+
+    context = multiprocessing.get_context("spawn")
+    processes = {}
+
+    def start_worker(worker_id):
+        process = context.Process(
+            target=run_worker,
+            args=(worker_id, shard_ranges[worker_id], shard_count, ipc_port, secret),
+            name=f"oyasumi-worker-{worker_id}"
+        )
+        process.start()
+        processes[worker_id] = process
+        print(f"Worker {worker_id} started (pid {process.pid}, shards {shard_ranges[worker_id]})")
+
+    def identify_time(worker_id):
+        """Seconds a worker needs to identify its shards before the next one may start"""
+        return IDENTIFY_INTERVAL * math.ceil(len(shard_ranges[worker_id]) / max_concurrency)
+
+    try:
+        for worker_id in range(worker_count):
+            start_worker(worker_id)
+            # Give the worker time to identify its shards before the next one starts
+            await asyncio.sleep(identify_time(worker_id))
+
+        restart_at = {}  # Worker id -> time it may be started again
+        # Restarts are staggered like startup: /restart full:True stops every worker at
+        # once, and identifying them all together would break max_concurrency
+        next_identify_at = time.monotonic()
+        while processes or restart_at:
+            await asyncio.sleep(1)
+
+            for worker_id, process in list(processes.items()):
+                if process.exitcode is None:
+                    continue
+
+                del processes[worker_id]
+                if process.exitcode == 0:
+                    print(f"Worker {worker_id} stopped")
+                else:
+                    when = max(time.monotonic() + RESTART_DELAY, next_identify_at)
+                    next_identify_at = when + identify_time(worker_id)
+                    restart_at[worker_id] = when
+                    print(f"Worker {worker_id} exited with code {process.exitcode}, restarting in {when - time.monotonic():.0f}s")
+
+            for worker_id, when in list(restart_at.items()):
+                if time.monotonic() >= when:
+                    del restart_at[worker_id]
+                    start_worker(worker_id)
+    finally:
+        for process in processes.values():
+            if process.is_alive():
+                process.terminate()
+        for process in processes.values():
+            process.join(timeout=10)
+        await hub.close()
+
+
+if __name__ == "__main__":
+    print("Starting Oyasumi Discord Bot (cluster mode)...")
+    print("Press Ctrl+C to stop all workers")
+    print("-" * 40)
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("\nCluster stopped by user")
+    except Exception as e:
+        print(f"\nCluster crashed: {e}")
+        sys.exit(1)
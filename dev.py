@@ -1,11 +1,16 @@
 #!/usr/bin/env python3
 """
 Development script for Oyasumi Discord Bot
-Automatically restarts the bot when Python files are modified
+Hot-reloads changed cogs in the running bot, and restarts it when anything else changes
 """
 
+import os
 import sys
+import json
 import time
+import hashlib
+import socket
+import secrets
 import subprocess
 import threading
 from pathlib import Path
@@ -18,56 +23,235 @@ if sys.platform == "win32":
     sys.stdout = codecs.getwriter("utf-8")(sys.stdout.detach())
     sys.stderr = codecs.getwriter("utf-8")(sys.stderr.detach())
 
+SRC_PATH = Path("./src")
+CONTROL_TIMEOUT = 10  # Seconds to wait for the bot to answer a reload
+QUIET_PERIOD = 0.3  # Seconds without file events that end a batch of changes
+MAX_BATCH_DELAY = 2.0  # Longest a batch waits during a continuous burst (e.g. a git checkout)
+
+
+def get_free_port():
+    """Ask the OS for a free localhost port"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def call_bot(port, secret, command, **args):
+    """Run a command on the bot over its control channel (see ControlServer in src/utils/ipc.py)"""
+    with socket.create_connection(("127.0.0.1", port), timeout=CONTROL_TIMEOUT) as conn:
+        stream = conn.makefile("rw", encoding="utf-8")
+        stream.write(json.dumps({"op": "hello", "secret": secret}) + "\n")
+        stream.write(json.dumps({"op": "call", "id": 0, "command": command, "args": args}) + "\n")
+        stream.flush()
+        line = stream.readline()
+
+    if not line:
+        raise ConnectionError("bot closed the control channel")
+    return json.loads(line)["result"]
+
+
+def hash_file(path):
+    """SHA-256 of a file's content, or None if it doesn't exist"""
+    try:
+        return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+    except OSError:
+        return None
+
+
+def get_extension(path):
+    """Extension that picks up a changed file when reloaded, or None if only a restart does"""
+    try:
+        relative = Path(path).resolve().relative_to(SRC_PATH.resolve())
+    except ValueError:
+        return None  # run.py, dev.py, ...
+
+    parts = relative.with_suffix("").parts
+    if len(parts) < 2 or parts[0] != "cogs" or parts[-1] == "__init__":
+        return None  # bot.py and utils/ are imported once per process
+
+    if parts[:2] == ("cogs", "impl"):
+        return f"cogs.{parts[-1]}"  # Lazy cog implementations reload through their stub
+    return ".".join(parts)
+
+
 class BotRestartHandler(FileSystemEventHandler):
     def __init__(self):
         self.process = None
         self.restart_timer = None
+        self.changed = set()  # Paths with file events in the current batch
+        self.changed_lock = threading.Lock()
+        self.apply_lock = threading.Lock()  # Held while a batch is applied, so reloads and restarts never overlap
+        self.stopping = False
+        self.batch_started = None  # time.monotonic() of the batch's first event
+        self.hashes = {}  # Resolved path -> content hash, to skip saves that changed nothing
+        self.build_index()
+        self.control_port = None
+        self.control_secret = None
         self.start_bot()
 
     def on_modified(self, event):
         """Handle file modification events"""
+        self.queue_change(event)
+
+    def on_created(self, event):
+        """Handle file creation events"""
+        self.queue_change(event)
+
+    def on_deleted(self, event):
+        """Handle file deletion events"""
+        self.queue_change(event)
+
+    def on_moved(self, event):
+        """Handle file rename events"""
+        # Editors and git often write a temporary file and rename it over the original
+        self.queue_change(event)
+        self.queue_change(event, event.dest_path)
+
+    def queue_change(self, event, path=None):
+        """Add a file event to the current batch"""
+        path = path or event.src_path
         if event.is_directory:
             return
 
-        # Only restart on Python file changes
-        if not event.src_path.endswith('.py'):
+        # Only react to Python file changes
+        if not path.endswith('.py'):
             return
 
         # Ignore temporary files and cache
-        if any(ignore in event.src_path for ignore in ['__pycache__', '.pyc', '~', '#']):
+        if any(ignore in path for ignore in ['__pycache__', '.pyc', '~', '#']):
+            return
+
+        with self.changed_lock:
+            self.changed.add(path)
+            now = time.monotonic()
+            if self.batch_started is None:
+                self.batch_started = now
+
+            # Wait for a quiet period, but never hold a batch longer than MAX_BATCH_DELAY
+            waited = now - self.batch_started
+            if self.restart_timer and waited < MAX_BATCH_DELAY:
+                self.restart_timer.cancel()
+                self.restart_timer = None
+            if self.restart_timer is None:
+                self.restart_timer = threading.Timer(
+                    max(0.0, min(QUIET_PERIOD, MAX_BATCH_DELAY - waited)), self.apply_changes
+                )
+                self.restart_timer.start()
+
+    def build_index(self):
+        """Hash every watched Python file"""
+        for path in list(SRC_PATH.rglob("*.py")) + list(Path(".").glob("*.py")):
+            if "__pycache__" not in path.parts:
+                self.hashes[str(path.resolve())] = hash_file(path)
+
+    def update_hash(self, path):
+        """Re-hash a file; returns True if its content (or existence) really changed"""
+        key = str(Path(path).resolve())
+        digest = hash_file(path)
+        if self.hashes.get(key) == digest:
+            return False
+
+        if digest is None:
+            self.hashes.pop(key, None)
+        else:
+            self.hashes[key] = digest
+        return True
+
+    def apply_changes(self):
+        """Hot-reload the cogs changed in this batch, or restart if a change can't be reloaded
+
+        Each batch runs on its own timer thread; a batch that fires while the
+        previous one is still reloading or restarting waits for it to finish.
+        """
+        with self.apply_lock:
+            if not self.stopping:
+                self.apply_batch()
+
+    def apply_batch(self):
+        with self.changed_lock:
+            changed, self.changed = self.changed, set()
+            self.batch_started = None
+            self.restart_timer = None
+
+        # Saves that didn't change anything (and repeat events for one file) drop out here
+        changed = sorted(path for path in changed if self.update_hash(path))
+        if not changed:
             return
 
         try:
-            print(f"\n📝 File changed: {event.src_path}")
+            print(f"\n📝 {len(changed)} file(s) changed: {', '.join(changed)}")
         except UnicodeEncodeError:
-            print(f"\nFile changed: {event.src_path}")
-        self.schedule_restart()
+            print(f"\n{len(changed)} file(s) changed: {', '.join(changed)}")
+
+        extensions = set()
+        for path in changed:
+            extension = get_extension(path)
+            if extension is None:
+                self.restart_bot()
+                return
+            extensions.add(extension)
 
-    def schedule_restart(self):
-        """Schedule a restart with debouncing to avoid multiple rapid restarts"""
-        if self.restart_timer:
-            self.restart_timer.cancel()
+        if not self.reload_extensions(sorted(extensions)):
+            self.restart_bot()
 
-        self.restart_timer = threading.Timer(1.0, self.restart_bot)
-        self.restart_timer.start()
+    def reload_extensions(self, extensions):
+        """Reload a batch of extensions in the running bot; returns False if a restart is needed instead"""
+        start = time.perf_counter()
+        try:
+            results = call_bot(self.control_port, self.control_secret, "reload_many", extensions=extensions)
+        except (OSError, ValueError) as e:
+            print(f"Control channel unavailable ({e})")
+            return False
+
+        if "results" not in results:
+            print(f"Reload failed: {results.get('error')}")
+            return False
+
+        elapsed = (time.perf_counter() - start) * 1000
+        needs_restart = False
+        for extension, result in results["results"].items():
+            status = result.get("status")
+            if status == "ok":
+                try:
+                    print(f"♻️ Reloaded {extension}")
+                except UnicodeEncodeError:
+                    print(f"Reloaded {extension}")
+            elif status in ("error", "skipped"):
+                # The old version stays loaded; restarting would fail on the same error
+                try:
+                    print(f"❌ Failed to reload {extension}: {result.get('error')}")
+                except UnicodeEncodeError:
+                    print(f"Failed to reload {extension}: {result.get('error')}")
+            else:
+                needs_restart = True  # not_loaded / not_found: a new cog, picked up by a restart
+
+        if not needs_restart:
+            print(f"Batch of {len(extensions)} reloaded in {elapsed:.0f}ms")
+        return not needs_restart
 
     def start_bot(self):
         """Start the bot process"""
         try:
             print("🌙 Starting Oyasumi Discord Bot (Development Mode)...")
             print("📁 Watching for file changes in src/ directory")
-            print("🔄 Bot will auto-restart when you modify Python files")
+            print("♻️ Changed cogs are reloaded in place; other changes restart the bot")
             print("❌ Press Ctrl+C to stop the development server")
         except UnicodeEncodeError:
             print("Starting Oyasumi Discord Bot (Development Mode)...")
             print("Watching for file changes in src/ directory")
-            print("Bot will auto-restart when you modify Python files")
+            print("Changed cogs are reloaded in place; other changes restart the bot")
             print("Press Ctrl+C to stop the development server")
         print("-" * 60)
 
+        # A fresh control channel per process; the bot listens on it once its cogs are loaded
+        self.control_port = get_free_port()
+        self.control_secret = secrets.token_hex(16)
+        env = dict(os.environ, DEV_CONTROL_PORT=str(self.control_port), DEV_CONTROL_SECRET=self.control_secret)
+
         try:
             self.process = subprocess.Popen(
                 [sys.executable, "run.py"],
+                env=env,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.STDOUT,
                 universal_newlines=True,
@@ -121,24 +305,28 @@ class BotRestartHandler(FileSystemEventHandler):
 
     def stop(self):
         """Clean shutdown"""
-        if self.restart_timer:
-            self.restart_timer.cancel()
+        self.stopping = True
+        with self.changed_lock:
+            if self.restart_timer:
+                self.restart_timer.cancel()
 
-        if self.process:
-            try:
-                self.process.terminate()
-                self.process.wait(timeout=5)
-            except subprocess.TimeoutExpired:
-                self.process.kill()
-                self.process.wait()
-            except Exception:
-                pass
+        # A batch that is already running finishes first, so it can't start a bot after this
+        with self.apply_lock:
+            if self.process:
+                try:
+                    self.process.terminate()
+                    self.process.wait(timeout=5)
+                except subprocess.TimeoutExpired:
+                    self.process.kill()
+                    self.process.wait()
+                except Exception:
+                    pass
 
 
 def main():
     """Main development server"""
     # Watch the src directory for changes
-    watch_path = Path('./src')
+    watch_path = SRC_PATH
 
     if not watch_path.exists():
         try:
@@ -4,19 +4,28 @@ Oyasumi Discord Bot - Startup Script
 Simple script to run the bot from the root directory
 """
 
+import time
+process_started = time.perf_counter()  # Start of the startup report's clock
+
 import sys
 import os
 from pathlib import Path
 
+# Resolved before the chdir below so a restart can run this script again
+run_script = Path(__file__).resolve()
+
 # Add the src directory to the Python path
-src_path = Path(__file__).parent / "src"
+src_path = run_script.parent / "src"
 sys.path.insert(0, str(src_path))
 
 # Change to src directory for relative imports
 os.chdir(src_path)
 
 # Import and run the bot
-from bot import main
+from utils.profiler import mark_process_start
+mark_process_start(process_started)
+from bot import main, OyasumiBot
+from utils.log import stop_logging
 import asyncio
 
 if __name__ == "__main__":
@@ -25,9 +34,23 @@ if __name__ == "__main__":
     print("-" * 40)
 
     try:
-        asyncio.run(main())
+        exit_code = asyncio.run(main())
     except KeyboardInterrupt:
         print("\nBot stopped by user")
+        stop_logging()
+        sys.exit(0)
     except Exception as e:
         print(f"\nBot crashed: {e}")
+        stop_logging()
         sys.exit(1)
+
+    # Flush the log queue now: os.execv below skips atexit handlers, and with them the shutdown log lines
+    stop_logging()
+
+    if exit_code == OyasumiBot.RESTART_EXIT_CODE:
+        # /restart full:True - replace this process with a fresh one, repeating the path setup above
+        print("\nRestarting bot...")
+        sys.stdout.flush()
+        os.execv(sys.executable, [sys.executable, str(run_script)] + sys.argv[1:])
+
+    sys.exit(exit_code)
@@ -1,5 +1,17 @@
+import time
+from utils.profiler import StartupProfiler, BusyTimer
+
+# Created before the remaining imports so their cost shows up in the startup report; it counts
+# from the launcher's process start when run.py or cluster.py recorded one
+startup_profiler = StartupProfiler()
+startup_profiler.start('imports')
+
 import os
+import sys
+import ast
+import json
 import asyncio
+import hashlib
 import logging
 from pathlib import Path
 from dotenv import load_dotenv
@@ -8,18 +20,32 @@ import discord
 from discord import app_commands
 from discord.ext import commands
 
-# Setup logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('bot.log'),
-        logging.StreamHandler()
-    ]
+from utils.ipc import ClusterClient, ControlServer
+from utils.memory import get_rss_bytes, format_bytes, MemoryDiagnostics
+from utils.log import setup_logging
+from utils.metrics import metrics, start_metrics_server
+from utils.lag import LoopLagMonitor
+from utils.http import trace_config
+from utils.tracing import tracer
+from utils.defer import AutoDeferResponse
+from utils.profiling import CommandProfiler
+from utils.storage import Storage
+
+startup_profiler.end('imports')
+
+with startup_profiler.phase('dotenv'):
+    load_dotenv()
+
+# Setup logging: queued to a background writer thread, rotated by size and age
+setup_logging(
+    level=os.getenv('LOG_LEVEL', 'INFO').upper(),
+    log_file=os.getenv('LOG_FILE', 'bot.log'),
+    max_bytes=int(os.getenv('LOG_MAX_BYTES', str(10 * 2 ** 20))),
+    backup_count=int(os.getenv('LOG_BACKUP_COUNT', '5')),
+    rotate_hours=int(os.getenv('LOG_ROTATE_HOURS', '24')),
+    json_output=os.getenv('LOG_FORMAT', 'text').lower() == 'json'
 )
 
-load_dotenv()
-
 TOKEN = os.getenv('TOKEN')
 OWNER_ID = os.getenv('OWNER_ID')
 
@@ -31,86 +57,690 @@ if not OWNER_ID:
 
 OWNER_ID = int(OWNER_ID)
 
+# Optional: sync commands to this guild only (instant, for development) instead of globally
+DEV_GUILD_ID = os.getenv('DEV_GUILD_ID')
+DEV_GUILD_ID = int(DEV_GUILD_ID) if DEV_GUILD_ID else None
+
+# Hashes of the last synced command tree, used to skip syncs that would change nothing
+SYNC_STATE_FILE = Path(__file__).parent / '.command_sync.json'
+
+# Per-phase and per-extension startup timings, written once the bot is ready
+STARTUP_REPORT_FILE = Path(__file__).parent / 'startup_report.json'
+
 # Bot configuration
 intents = discord.Intents.default()
 intents.message_content = True  # Required for message content access (for non-slash features)
 intents.members = True  # Optional: for member-related events
 
+# Cache profile: how much member and message state is held in memory.
+# 'full' chunks every guild at startup; 'balanced' and 'minimal' never chunk,
+# since chunking on demand would keep every member of the guild cached for good.
+# Commands fetch the single members they need instead (see get_or_fetch_member).
+CACHE_PROFILES = {
+    'full': {
+        'member_cache_flags': discord.MemberCacheFlags.from_intents(intents),
+        'chunk_guilds_at_startup': True,
+        'max_messages': 1000
+    },
+    'balanced': {
+        'member_cache_flags': discord.MemberCacheFlags(voice=True, joined=True),
+        'chunk_guilds_at_startup': False,
+        'max_messages': 250
+    },
+    'minimal': {
+        'member_cache_flags': discord.MemberCacheFlags.none(),
+        'chunk_guilds_at_startup': False,
+        'max_messages': None  # No message cache
+    }
+}
+CACHE_PROFILE = os.getenv('CACHE_PROFILE', 'full').lower()
+if CACHE_PROFILE not in CACHE_PROFILES:
+    raise ValueError(f'CACHE_PROFILE must be one of: {", ".join(CACHE_PROFILES)}')
+
+cache_settings = dict(CACHE_PROFILES[CACHE_PROFILE])
+if os.getenv('MESSAGE_CACHE_SIZE'):
+    cache_settings['max_messages'] = int(os.getenv('MESSAGE_CACHE_SIZE')) or None
+
+# Prometheus metrics on http://127.0.0.1:METRICS_PORT/metrics (cluster workers add their id); 0 disables
+METRICS_PORT = int(os.getenv('METRICS_PORT', '9464'))
+
+# A callback blocking the event loop longer than this gets its stack logged
+LOOP_LAG_THRESHOLD_MS = int(os.getenv('LOOP_LAG_THRESHOLD_MS', '250'))
+
+# Set by dev.py: a local control channel it uses to hot-reload changed cogs
+DEV_CONTROL_PORT = int(os.getenv('DEV_CONTROL_PORT', '0'))
+DEV_CONTROL_SECRET = os.getenv('DEV_CONTROL_SECRET')
+
+# Slash commands that haven't responded within this budget are deferred for them (Discord allows 3s); 0 disables
+AUTO_DEFER_MS = int(os.getenv('AUTO_DEFER_MS', '2000'))
+
+# On shutdown or restart, commands already running get this long to finish before the connection closes
+DRAIN_GRACE_SECONDS = float(os.getenv('DRAIN_GRACE_SECONDS', '15'))
+
+# SQLite database (WAL mode) behind bot.storage; cluster workers share it
+STORAGE_FILE = os.getenv('STORAGE_FILE', str(Path(__file__).parent / 'oyasumi.db'))
+
+# Slash command traces: a random TRACE_SAMPLE_RATE share plus every command slower than TRACE_SLOW_MS
+tracer.configure(
+    path=os.getenv('TRACE_FILE', 'traces.json'),
+    sample_rate=float(os.getenv('TRACE_SAMPLE_RATE', '0.01')),
+    slow_threshold=int(os.getenv('TRACE_SLOW_MS', '2000')) / 1000
+)
+
+command_latency = metrics.histogram(
+    'oyasumi_command_duration_seconds',
+    'Time from dispatch to the end of a slash command handler',
+    labels=('command', 'status')
+)
+command_invocations = metrics.counter(
+    'oyasumi_commands_total',
+    'Slash command invocations by outcome',
+    labels=('command', 'status')
+)
+
+
+class OyasumiTree(app_commands.CommandTree):
+    """Command tree that times every slash command and routes errors to the bot's handler"""
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if self.client.draining:
+            if interaction.type is discord.InteractionType.application_command:
+                await interaction.response.send_message(
+                    '🔄 The bot is restarting. Please try again in a moment.',
+                    ephemeral=True
+                )
+            return False
+
+        # The command runs in this task; drain() waits for it
+        task = asyncio.current_task()
+        self.client.in_flight.add(task)
+        task.add_done_callback(self.client.in_flight.discard)
+
+        interaction.extras['dispatched_at'] = time.perf_counter()
+        if interaction.type is discord.InteractionType.application_command and interaction.command:
+            name = interaction.command.qualified_name
+            # Lets the lag monitor say which command was running when the loop stalled
+            asyncio.current_task().set_name(f'command /{name}')
+            interaction.extras['trace'] = tracer.start_trace(f'/{name}', command=name, guild=interaction.guild_id)
+
+            if AUTO_DEFER_MS:
+                # Commands whose replies are private opt in with extras={'defer_ephemeral': True};
+                # others still get ephemeral replies, at the cost of deleting the public thinking message
+                AutoDeferResponse.install(
+                    interaction, AUTO_DEFER_MS / 1000,
+                    ephemeral=interaction.command.extras.get('defer_ephemeral', False)
+                )
+
+            self.client.command_profiler.enter(interaction)  # No-op unless /profile is running
+        return True
+
+    async def on_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
+        record_command(interaction, 'rate_limited' if isinstance(error, app_commands.CommandOnCooldown) else 'error')
+        await self.client.on_app_command_error(interaction, error)
+        await finish_response(interaction)
+
+
+def record_command(interaction, status):
+    """Count a finished slash command, observe how long it took since dispatch and close its trace"""
+    interaction.client.command_profiler.exit(interaction)
+    if isinstance(interaction.response, AutoDeferResponse):
+        interaction.response.cancel()
+
+    started = interaction.extras.get('dispatched_at')
+    name = interaction.command.qualified_name if interaction.command else 'unknown'
+    command_invocations.inc(name, status)
+    if started is not None:
+        command_latency.observe(time.perf_counter() - started, name, status)
+    tracer.finish_trace(interaction.extras.get('trace'), status=status)
 
-class OyasumiBot(commands.Bot):
-    def __init__(self):
+
+async def finish_response(interaction):
+    """Clear an automatic defer the command never replied to (see utils/defer.py)"""
+    if isinstance(interaction.response, AutoDeferResponse):
+        await interaction.response.finish()
+
+
+class OyasumiBot(commands.AutoShardedBot):
+    RESTART_EXIT_CODE = 75  # Exit code asking run.py or cluster.py to start the process again
+
+    def __init__(self, shard_ids=None, shard_count=None, cluster=None):
         super().__init__(
             command_prefix='!',  # Fallback prefix, rarely used with slash commands
             description='Oyasumi - A modern Discord bot for 2025 with slash commands',
             owner_id=OWNER_ID,
             case_insensitive=True,
             intents=intents,
-            help_command=None  # We'll use slash commands for help
+            help_command=None,  # We'll use slash commands for help
+            shard_ids=shard_ids,  # None lets discord.py run every recommended shard in this process
+            shard_count=shard_count,
+            tree_cls=OyasumiTree,
+            http_trace=trace_config,  # Time Discord API calls (and trace interaction responses) too
+            **cache_settings
         )
         self.logger = logging.getLogger('bot')
+        self.cluster = cluster  # ClusterClient when running as a cluster worker (see cluster.py)
+        self.ipc_handlers = {}  # Command name -> coroutine(**args) answering cluster broadcasts
+        self.exit_code = 0  # Process exit code once closed
+        self.cache_profile = CACHE_PROFILE
+        self.extensions_ready = asyncio.Event()  # Set once load_extensions has finished; IPC calls wait for it
+        self.lazy_extension_stats = {}  # Implementation extension -> its profiler timing when first used (see utils/lazy.py)
+        self.profiler = startup_profiler
+        self.extension_timers = {}  # Extension -> BusyTimer while it loads at startup
+        self.extension_import_ms = {}  # Extension -> its own time until its setup first added a cog
+        self.extension_sources = {}  # Extension -> (mtime_ns, sha256) of the source it was loaded from
+        self.storage = Storage(STORAGE_FILE)  # Durable key/value and table storage for cogs (see utils/storage.py)
+        self.command_profiler = CommandProfiler()  # On-demand per-command profiling (see /profile)
+        self.memory_diagnostics = MemoryDiagnostics()  # tracemalloc snapshots and diffs (see /memory)
+        self.metrics_runner = None  # aiohttp runner serving /metrics
+        self.control_server = None  # ControlServer for dev.py, when DEV_CONTROL_PORT is set
+        self.lag_monitor = LoopLagMonitor(threshold=LOOP_LAG_THRESHOLD_MS / 1000)
+        self.draining = False  # Set once shutdown starts; new interactions are turned away
+        self.in_flight = set()  # Tasks running slash commands right now
+        self.drain_task = None
+        self.close_task = None  # Runs the teardown once, however many times close() is called
+
+        metrics.gauge(
+            'oyasumi_gateway_latency_seconds',
+            'Heartbeat latency per shard',
+            labels=('shard',),
+            callback=lambda: {(str(shard_id),): latency for shard_id, latency in self.latencies}
+        )
+        metrics.gauge(
+            'oyasumi_guilds',
+            'Guilds cached by this process',
+            callback=lambda: {(): len(self.guilds)}
+        )
+
+    async def add_cog(self, cog, /, *, override=False, **kwargs):
+        """Add a cog, noting when its extension finished importing (setup is now running)"""
+        timer = self.extension_timers.get(cog.__module__)
+        if timer is not None:
+            self.extension_import_ms.setdefault(cog.__module__, timer.elapsed_ms())
+        await super().add_cog(cog, override=override, **kwargs)
+
+    async def load_extension(self, name, *, package=None):
+        """Load an extension, remembering which version of its source was loaded"""
+        await super().load_extension(name, package=package)
+        self.record_extension_source(name)
+
+    async def reload_extension(self, name, *, package=None):
+        """Reload an extension, remembering which version of its source was loaded"""
+        await super().reload_extension(name, package=package)
+        self.record_extension_source(name)
+
+    async def unload_extension(self, name, *, package=None):
+        """Unload an extension and forget its source version"""
+        await super().unload_extension(name, package=package)
+        self.extension_sources.pop(name, None)
+
+    def record_extension_source(self, name):
+        """Store the mtime and hash of a loaded extension's source file"""
+        source = getattr(sys.modules.get(name), '__file__', None)
+        if source is None:
+            return
+        try:
+            path = Path(source)
+            self.extension_sources[name] = (path.stat().st_mtime_ns, hashlib.sha256(path.read_bytes()).hexdigest())
+        except OSError:
+            self.extension_sources.pop(name, None)
+
+    def get_changed_extensions(self):
+        """Loaded extensions whose source changed on disk since they were loaded
+
+        Files with an unchanged mtime are skipped without reading them; a new
+        mtime with the same content (e.g. a touch) only refreshes the index.
+        """
+        changed = []
+        for name, (mtime_ns, digest) in list(self.extension_sources.items()):
+            path = Path(sys.modules[name].__file__)
+            try:
+                current_mtime = path.stat().st_mtime_ns
+                if current_mtime == mtime_ns:
+                    continue
+                current_digest = hashlib.sha256(path.read_bytes()).hexdigest()
+            except OSError:
+                changed.append(name)  # Deleted; reloading reports it
+                continue
+
+            if current_digest == digest:
+                self.extension_sources[name] = (current_mtime, digest)
+            else:
+                changed.append(name)
+        return changed
 
     async def setup_hook(self):
         """Called when the bot is starting up"""
+        self.profiler.end('login')
+        self.profiler.start('setup_hook')
         self.logger.info('Bot is starting up...')
+        self.lag_monitor.start()
+
+        if self.cluster:
+            await self.cluster.connect(self.handle_ipc)
+            self.logger.info('Cluster worker %s running shards %s', self.cluster.worker_id, self.shard_ids)
+
+        if METRICS_PORT:
+            await self.start_metrics()
+
+        # Cogs read their state in cog_load, so storage opens before any extension loads
+        with self.profiler.phase('storage'):
+            await self.storage.open()
 
-        # Load extensions first
-        await self.load_extensions()
+        # Load extensions first; every cog's setup has completed once this returns
+        with self.profiler.phase('load_extensions'):
+            await self.load_extensions()
 
-        # Wait a moment for cogs to fully initialize
-        await asyncio.sleep(1)
+        if DEV_CONTROL_PORT and DEV_CONTROL_SECRET:
+            # dev.py calls the same handlers as cluster broadcasts (e.g. 'reload')
+            self.control_server = ControlServer(DEV_CONTROL_SECRET, self.handle_ipc)
+            await self.control_server.start(port=DEV_CONTROL_PORT)
+            self.logger.info('Dev control channel listening on port %s', DEV_CONTROL_PORT)
 
-        # Sync slash commands
+        # Commands are application-wide, so in a cluster only the first worker syncs
+        if not self.cluster or self.cluster.worker_id == 0:
+            await self.sync_on_startup()
+
+        self.profiler.end('setup_hook')
+        self.profiler.start('gateway_connect')
+
+    async def sync_on_startup(self):
+        """Sync slash commands, skipping the rate-limited API call if the tree is unchanged"""
         try:
             self.logger.info('Syncing slash commands...')
-            synced = await self.tree.sync()
-            self.logger.info(f'Successfully synced {len(synced)} slash commands')
+            with self.profiler.phase('tree_sync'):
+                result = await self.sync_commands()
 
-            # Log the synced commands
-            for command in synced:
-                self.logger.info(f'Synced command: /{command.name}')
+            if result['synced'] is None:
+                self.logger.info('Command tree unchanged since last sync (%s), skipping sync', result['scope'])
+            else:
+                self.logger.info('Successfully synced %s slash commands (%s)', len(result['synced']), result['scope'])
+
+                # Log the synced commands
+                for command in result['synced']:
+                    self.logger.info('Synced command: /%s', command.name)
 
         except Exception as e:
-            self.logger.error(f'Failed to sync commands: {e}', exc_info=True)
+            self.logger.error('Failed to sync commands: %s', e, exc_info=True)
+
+    def register_ipc_handler(self, command, handler):
+        """Register a coroutine that answers a broadcast command on this process"""
+        self.ipc_handlers[command] = handler
+
+    async def handle_ipc(self, command, args):
+        """Answer a broadcast command with the registered handler"""
+        # The cluster link is up before the cogs that register handlers have loaded
+        await self.extensions_ready.wait()
+        handler = self.ipc_handlers.get(command)
+        if handler is None:
+            return {'error': f'Unknown command: {command}'}
+        return await handler(**args)
+
+    async def broadcast(self, command, **args):
+        """Run a registered command on every cluster worker and collect the results
+
+        Outside cluster mode the command simply runs locally. Returns a list of
+        {'worker', 'result'} dicts.
+        """
+        if self.cluster:
+            return await self.cluster.broadcast(command, **args)
+        return [{'worker': 0, 'result': await self.handle_ipc(command, args)}]
+
+    async def start_metrics(self):
+        """Serve the metrics registry on localhost; each cluster worker gets its own port"""
+        port = METRICS_PORT + (self.cluster.worker_id if self.cluster else 0)
+        try:
+            self.metrics_runner = await start_metrics_server(metrics, '127.0.0.1', port)
+            self.logger.info('Serving metrics on http://127.0.0.1:%s/metrics', port)
+        except OSError as e:
+            self.logger.warning('Failed to start metrics server on port %s: %s', port, e)
+
+    async def drain(self):
+        """Turn away new interactions and give running commands DRAIN_GRACE_SECONDS to finish
+
+        Safe to call more than once; every caller waits for the same drain.
+        The calling task is not waited for, so a command can drain and close the bot.
+        """
+        if self.drain_task is None:
+            self.draining = True
+            self.drain_task = asyncio.create_task(self.wait_for_in_flight(asyncio.current_task()))
+        await asyncio.shield(self.drain_task)
+
+    async def wait_for_in_flight(self, caller):
+        """Wait for every running command except the caller, up to the grace period"""
+        pending = [task for task in self.in_flight if task is not caller]
+        if not pending:
+            return
+
+        self.logger.info('Draining %s in-flight command(s) for up to %.0fs...', len(pending), DRAIN_GRACE_SECONDS)
+        _, still_running = await asyncio.wait(pending, timeout=DRAIN_GRACE_SECONDS)
+        if still_running:
+            self.logger.warning('%s command(s) still running after the grace period', len(still_running))
+
+    async def close(self):
+        """Drain running commands, then stop monitoring, the metrics server, the cluster link and the gateway
+
+        Extensions are unloaded while closing, before the connection goes away, so
+        cogs checkpoint background work in cog_unload; storage closes last to take it.
+        Safe to call more than once (signal handler, /shutdown, a cluster broadcast):
+        every caller waits for the same teardown.
+        """
+        await self.drain()  # Here rather than in the teardown task, so the calling command isn't waited for
+        if self.close_task is None:
+            self.close_task = asyncio.create_task(self.tear_down())
+        await asyncio.shield(self.close_task)
+
+    async def tear_down(self):
+        """Run once by close()"""
+        self.lag_monitor.stop()
+        if self.control_server:
+            await self.control_server.close()
+        if self.metrics_runner:
+            await self.metrics_runner.cleanup()
+        if self.cluster:
+            await self.cluster.close()
+        await super().close()
+        await self.storage.close()
+
+    async def get_or_fetch_member(self, guild, user_id):
+        """Get a member from the cache, fetching just that member if it isn't cached"""
+        member = guild.get_member(user_id)
+        if member is not None:
+            return member
+        try:
+            return await guild.fetch_member(user_id)
+        except (discord.NotFound, discord.HTTPException):
+            return None
+
+    def get_cache_stats(self):
+        """Count what the member, user and message caches currently hold"""
+        return {
+            'profile': self.cache_profile,
+            'guilds': len(self.guilds),
+            'chunked_guilds': sum(1 for guild in self.guilds if guild.chunked),
+            'members': sum(len(guild.members) for guild in self.guilds),
+            'users': len(self.users),
+            'messages': len(self.cached_messages),
+            'max_messages': cache_settings['max_messages'],
+            'rss_bytes': get_rss_bytes()
+        }
+
+    async def sync_commands(self, force=False):
+        """Sync the command tree unless its hash matches the last successful sync
+
+        Returns a dict with the sync scope, the synced commands (None if skipped)
+        and the command names added, removed and changed since the last sync.
+        """
+        guild = discord.Object(id=DEV_GUILD_ID) if DEV_GUILD_ID else None
+        scope = f'guild {DEV_GUILD_ID}' if guild else 'global'
+        if guild:
+            # Guild commands update instantly, unlike global ones
+            self.tree.copy_global_to(guild=guild)
+
+        current = self.get_command_hashes(guild)
+        state = self.load_sync_state()
+        previous = state.get(scope, {})
+        previous_commands = previous.get('commands', {})
+        tree_hash = hashlib.sha256(json.dumps(current, sort_keys=True).encode()).hexdigest()
+
+        result = {
+            'scope': scope,
+            'synced': None,
+            'added': sorted(current.keys() - previous_commands.keys()),
+            'removed': sorted(previous_commands.keys() - current.keys()),
+            'changed': sorted(
+                name for name in current.keys() & previous_commands.keys()
+                if current[name] != previous_commands[name]
+            )
+        }
+
+        if not force and previous.get('hash') == tree_hash:
+            return result
+
+        result['synced'] = await self.tree.sync(guild=guild)
+
+        state[scope] = {'hash': tree_hash, 'commands': current}
+        self.save_sync_state(state)
+        return result
+
+    def get_command_hashes(self, guild=None):
+        """Hash each command's serialized payload, keyed by command name"""
+        hashes = {}
+        for command in self.tree.get_commands(guild=guild):
+            payload = command.to_dict(self.tree)
+            key = command.name if payload.get('type', 1) == 1 else f'{command.name} (context menu)'
+            hashes[key] = hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+        return hashes
+
+    def load_sync_state(self):
+        """Load the last synced command hashes from disk"""
+        try:
+            return json.loads(SYNC_STATE_FILE.read_text(encoding='utf-8'))
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            self.logger.warning('Ignoring unreadable sync state %s: %s', SYNC_STATE_FILE, e)
+            return {}
+
+    def save_sync_state(self, state):
+        """Persist the synced command hashes to disk"""
+        try:
+            SYNC_STATE_FILE.write_text(json.dumps(state, indent=2, sort_keys=True), encoding='utf-8')
+        except OSError as e:
+            self.logger.warning('Failed to save sync state %s: %s', SYNC_STATE_FILE, e)
+
+    async def load_extension_profiled(self, name):
+        """Load an extension and record its timing in the startup profiler; returns that entry
+
+        Extensions load concurrently, so elapsed time includes the others' work;
+        the BusyTimer counts only the time this extension's load itself runs.
+        """
+        start = time.perf_counter()
+        timer = self.extension_timers[name] = BusyTimer(self.load_extension(name))
+        try:
+            await timer
+        finally:
+            del self.extension_timers[name]
+            import_ms = self.extension_import_ms.pop(name, None)
+        total_ms = timer.elapsed_ms()
+        self.profiler.record_extension(
+            name, import_ms if import_ms is not None else total_ms, total_ms, (time.perf_counter() - start) * 1000
+        )
+        return self.profiler.extensions[name]
 
     async def load_extensions(self):
-        """Load all cog files from the cogs directory"""
+        """Load all cog files from the cogs directory; sets extensions_ready however it ends"""
+        try:
+            await self.load_cog_files()
+        finally:
+            self.extensions_ready.set()
+
+    async def load_cog_files(self):
         # Get the directory where this script is located
         current_dir = Path(__file__).parent
         cogs_dir = current_dir / 'cogs'
 
-        self.logger.info(f'Looking for cogs in: {cogs_dir.absolute()}')
+        self.logger.info('Looking for cogs in: %s', cogs_dir.absolute())
 
         if not cogs_dir.exists():
-            self.logger.error(f'Cogs directory not found: {cogs_dir.absolute()}')
+            self.logger.error('Cogs directory not found: %s', cogs_dir.absolute())
             return
 
         cog_files = list(cogs_dir.glob('*.py'))
-        self.logger.info(f'Found {len(cog_files)} potential cog files')
+        self.logger.info('Found %s potential cog files', len(cog_files))
+
+        dependencies = {
+            f'cogs.{cog_file.stem}': self.read_extension_dependencies(cog_file)
+            for cog_file in cog_files
+            if not cog_file.name.startswith('__')
+        }
+
+        async def load(cog_name):
+            self.logger.info('Loading extension: %s', cog_name)
+            timing = await self.load_extension_profiled(cog_name)
+            self.logger.info('Successfully loaded %s in %.1fms (%.1fms elapsed)', cog_name, timing['total_ms'], timing['wall_ms'])
+            return True
+
+        start = time.perf_counter()
+        failed = await self.run_in_dependency_order(dependencies, load, 'loading')
+        self.logger.info(
+            'Loaded %s/%s extensions in %.1fms',
+            len(dependencies) - len(failed), len(dependencies), (time.perf_counter() - start) * 1000
+        )
 
-        for cog_file in cog_files:
-            if cog_file.name.startswith('__'):
-                continue
+    async def reload_extensions(self, extensions):
+        """Reload extensions in dependency order, independent ones concurrently
+
+        Returns {extension: {'status', 'ms', 'error'?}}; the status is 'ok',
+        'not_loaded', 'not_found', 'error' or 'skipped' (a dependency failed).
+        """
+        extensions = set(extensions)
+        # A lazy cog's stub reloads its implementation too (see utils/lazy.py)
+        extensions -= {
+            name for name in extensions
+            if name.startswith('cogs.impl.') and f'cogs.{name.rsplit(".", 1)[1]}' in extensions
+        }
+
+        # Only order against extensions in this batch; the rest are already loaded
+        dependencies = {
+            name: tuple(
+                dependency for dependency in self.read_extension_dependencies(self.get_extension_file(name))
+                if dependency in extensions
+            )
+            for name in extensions
+        }
+        results = {}
+
+        async def reload(name):
+            start = time.perf_counter()
+            try:
+                await self.reload_extension(name)
+                results[name] = {'status': 'ok'}
+            except commands.ExtensionNotLoaded:
+                results[name] = {'status': 'not_loaded'}
+            except commands.ExtensionNotFound:
+                results[name] = {'status': 'not_found'}
+            except Exception as e:
+                self.logger.error('Failed to reload %s: %s', name, e, exc_info=True)
+                results[name] = {'status': 'error', 'error': str(e)}
+            results[name]['ms'] = (time.perf_counter() - start) * 1000
+            return results[name]['status'] == 'ok'
 
-            cog_name = f'cogs.{cog_file.stem}'
+        for name in await self.run_in_dependency_order(dependencies, reload, 'reloading'):
+            results.setdefault(name, {'status': 'skipped', 'error': 'a dependency failed', 'ms': 0.0})
+        return results
+
+    def get_extension_file(self, name):
+        """Source path of an extension under src/"""
+        return Path(__file__).parent.joinpath(*name.split('.')).with_suffix('.py')
+
+    async def run_in_dependency_order(self, dependencies, action, verb):
+        """Run action(name) for every extension once its dependencies have succeeded
+
+        Independent extensions run concurrently. Returns the extensions that
+        failed (action raised or returned False) or were skipped.
+        """
+        done = {name: asyncio.Event() for name in dependencies}
+        failed = self.find_dependency_cycles(dependencies)
+
+        for name in failed:
+            self.logger.error('Not %s %s: circular extension dependency', verb, name)
+            done[name].set()
+
+        async def run(name):
             try:
-                self.logger.info(f'Loading extension: {cog_name}')
-                await self.load_extension(cog_name)
-                self.logger.info(f'Successfully loaded {cog_name}')
+                # Wait for this extension's dependencies
+                for dependency in dependencies[name]:
+                    if dependency not in done:
+                        self.logger.error('Not %s %s: unknown dependency %s', verb, name, dependency)
+                        failed.add(name)
+                        return
+
+                    await done[dependency].wait()
+                    if dependency in failed:
+                        self.logger.error('Not %s %s: dependency %s failed', verb, name, dependency)
+                        failed.add(name)
+                        return
+
+                if not await action(name):
+                    failed.add(name)
             except Exception as e:
-                self.logger.error(f'Failed to load {cog_name}: {e}', exc_info=True)
+                failed.add(name)
+                self.logger.error('Failed %s %s: %s', verb, name, e, exc_info=True)
+            finally:
+                done[name].set()
+
+        await asyncio.gather(*(run(name) for name in dependencies if name not in failed))
+        return failed
+
+    def read_extension_dependencies(self, cog_file):
+        """Read a cog's module-level DEPENDENCIES tuple without importing it"""
+        try:
+            tree = ast.parse(cog_file.read_text(encoding='utf-8'))
+        except (OSError, SyntaxError):
+            return ()  # load_extension will report the real error
+
+        for node in tree.body:
+            if (isinstance(node, ast.Assign)
+                    and any(isinstance(target, ast.Name) and target.id == 'DEPENDENCIES' for target in node.targets)):
+                try:
+                    value = ast.literal_eval(node.value)
+                except ValueError:
+                    self.logger.error('Ignoring non-literal DEPENDENCIES in %s', cog_file.name)
+                    continue
+                # A bare string would otherwise become a tuple of its characters
+                if not isinstance(value, (tuple, list)) or not all(isinstance(name, str) for name in value):
+                    self.logger.error('Ignoring DEPENDENCIES in %s: expected a tuple or list of extension names', cog_file.name)
+                    continue
+                return tuple(value)
+        return ()
+
+    def find_dependency_cycles(self, dependencies):
+        """Return the extensions that can never load because they sit on or behind a dependency cycle"""
+        remaining = {name: set(deps) & dependencies.keys() for name, deps in dependencies.items()}
+
+        # Repeatedly peel off extensions whose dependencies are all resolvable
+        while True:
+            resolvable = [name for name, deps in remaining.items() if not deps]
+            if not resolvable:
+                return set(remaining)
+            for name in resolvable:
+                del remaining[name]
+            for deps in remaining.values():
+                deps.difference_update(resolvable)
+
+    async def on_connect(self):
+        """Called when the gateway connection is established"""
+        if not self.profiler.finished:
+            self.profiler.end('gateway_connect')
+            self.profiler.start('ready')
 
     async def on_ready(self):
         """Called when bot is fully ready"""
-        self.logger.info(f'{self.user} is ready!')
-        self.logger.info(f'Bot ID: {self.user.id}')
-        self.logger.info(f'Connected to {len(self.guilds)} guild(s)')
+        if not self.profiler.finished:
+            self.profiler.end('ready')
+            try:
+                await self.loop.run_in_executor(None, self.profiler.finish, STARTUP_REPORT_FILE)
+                self.logger.info('Startup took %.0fms, report written to %s', self.profiler.total_ms, STARTUP_REPORT_FILE)
+            except OSError as e:
+                self.logger.warning('Failed to write startup report: %s', e)
+
+        self.logger.info('%s is ready!', self.user)
+        self.logger.info('Bot ID: %s', self.user.id)
+        self.logger.info('Connected to %s guild(s)', len(self.guilds))
+
+        stats = self.get_cache_stats()
+        self.logger.info(
+            'Cache profile %s: %s members, %s users, %s/%s messages cached, RSS %s',
+            stats['profile'], stats['members'], stats['users'], stats['messages'], stats['max_messages'],
+            format_bytes(stats['rss_bytes'])
+        )
 
         # Log loaded cogs
-        self.logger.info(f'Loaded cogs: {[cog for cog in self.cogs.keys()]}')
+        self.logger.info('Loaded cogs: %s', [cog for cog in self.cogs.keys()])
 
         # Log available commands
         commands_list = [cmd.name for cmd in self.tree.get_commands()]
-        self.logger.info(f'Available slash commands: {commands_list}')
+        self.logger.info('Available slash commands: %s', commands_list)
 
         # Set bot activity
         activity = discord.Activity(
@@ -119,6 +749,11 @@ class OyasumiBot(commands.Bot):
         )
         await self.change_presence(activity=activity)
 
+    async def on_app_command_completion(self, interaction: discord.Interaction, command):
+        """Called after a slash command handler finishes without raising"""
+        record_command(interaction, 'ok')
+        await finish_response(interaction)
+
     async def on_app_command_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
         """Global error handler for slash commands"""
         if isinstance(error, app_commands.CommandOnCooldown):
@@ -143,7 +778,7 @@ class OyasumiBot(commands.Bot):
             return
 
         if isinstance(error, app_commands.CommandNotFound):
-            self.logger.error(f'Command not found: {error}')
+            self.logger.error('Command not found: %s', error)
             await interaction.response.send_message(
                 '❌ This command is not available. The bot may need to sync its commands.',
                 ephemeral=True
@@ -151,11 +786,11 @@ class OyasumiBot(commands.Bot):
             return
 
         # Log unexpected errors
-        self.logger.error(f'Unexpected error in /{interaction.command.name if interaction.command else "unknown"}: {error}', exc_info=error)
+        self.logger.error('Unexpected error in /%s: %s', interaction.command.name if interaction.command else 'unknown', error, exc_info=error)
 
-        # Send error message
+        # Send error message (an automatically deferred response still takes send_message)
         try:
-            if interaction.response.is_done():
+            if interaction.response.is_done() and not getattr(interaction.response, 'auto_deferred', None):
                 await interaction.followup.send('❌ An unexpected error occurred. The incident has been logged.', ephemeral=True)
             else:
                 await interaction.response.send_message('❌ An unexpected error occurred. The incident has been logged.', ephemeral=True)
@@ -163,20 +798,41 @@ class OyasumiBot(commands.Bot):
             pass
 
 
-async def main():
-    """Main bot runner"""
-    bot = OyasumiBot()
-
+async def run_bot(bot):
+    """Run a bot until it closes; returns False if it crashed"""
     try:
+        bot.profiler.start('login')
         await bot.start(TOKEN)
+        return True
     except KeyboardInterrupt:
         logging.info('Received interrupt signal')
+        return True
     except Exception as e:
-        logging.error(f'Bot crashed: {e}', exc_info=e)
+        logging.error('Bot crashed: %s', e, exc_info=e)
+        return False
     finally:
         if not bot.is_closed():
             await bot.close()
 
 
+async def main():
+    """Main bot runner; returns the process exit code (RESTART_EXIT_CODE asks run.py to restart)"""
+    bot = OyasumiBot()
+    if not await run_bot(bot):
+        return 1
+    return bot.exit_code
+
+
+async def run_worker(worker_id, shard_ids, shard_count, ipc_port, ipc_secret):
+    """Cluster worker runner: one process owning a range of shards (started by cluster.py)"""
+    cluster = ClusterClient(worker_id, ipc_port, ipc_secret)
+    bot = OyasumiBot(shard_ids=shard_ids, shard_count=shard_count, cluster=cluster)
+
+    # Returns the process exit code: 0 stops the worker, anything else makes cluster.py start it again
+    if not await run_bot(bot):
+        return 1
+    return bot.exit_code
+
+
 if __name__ == '__main__':
     asyncio.run(main())
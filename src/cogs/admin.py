@@ -2,15 +2,101 @@ import discord
 from discord import app_commands
 from discord.ext import commands
 from datetime import datetime, timezone
-import os
-import sys
+import io
+import time
+import asyncio
+import json
+
+from utils.memory import format_bytes
+from utils.tracing import current_span
 
 
 class Admin(commands.Cog):
     """Admin and owner-only commands"""
 
+    PROFILE_TIMEOUT = 14 * 60  # Seconds a /profile report waits; interaction followups expire after 15 minutes
+
     def __init__(self, bot):
         self.bot = bot
+        self.profile_tasks = set()  # Background tasks waiting to post /profile reports
+        self.shutdown_task = None  # Closes the bot after a shutdown broadcast has been answered
+
+    async def cog_load(self):
+        """Answer reload and shutdown broadcasts from other cluster workers"""
+        self.bot.register_ipc_handler('reload', self.reload_extension_locally)
+        self.bot.register_ipc_handler('reload_many', self.reload_extensions_locally)
+        self.bot.register_ipc_handler('reload_changed', self.reload_changed_locally)
+        self.bot.register_ipc_handler('reload_all', self.reload_all_locally)
+        self.bot.register_ipc_handler('shutdown', self.shutdown_locally)
+
+    async def cog_unload(self):
+        """Stop waiting for profile reports; their sessions end in post_profile's cleanup"""
+        for task in self.profile_tasks:
+            task.cancel()
+
+    async def reload_extension_locally(self, extension):
+        """Reload an extension in this process and report the outcome"""
+        try:
+            await self.bot.reload_extension(extension)
+            return {'status': 'ok'}
+        except commands.ExtensionNotLoaded:
+            return {'status': 'not_loaded'}
+        except commands.ExtensionNotFound:
+            return {'status': 'not_found'}
+        except Exception as e:
+            self.bot.logger.error('Failed to reload %s: %s', extension, e, exc_info=True)
+            return {'status': 'error', 'error': str(e)}
+
+    async def reload_extensions_locally(self, extensions):
+        """Reload a batch of extensions in this process (used by dev.py) and report each outcome"""
+        return {'results': await self.bot.reload_extensions(extensions)}
+
+    async def reload_changed_locally(self):
+        """Reload every extension whose source changed since it was loaded"""
+        return {'results': await self.bot.reload_extensions(self.bot.get_changed_extensions())}
+
+    async def reload_all_locally(self):
+        """Reload every extension in this process, keeping its gateway session and caches"""
+        start = time.perf_counter()
+        reloaded, failed = 0, {}
+
+        for extension in list(self.bot.extensions):
+            # Lazy cog implementations are reloaded by their stub (see utils/lazy.py)
+            if extension.startswith('cogs.impl.'):
+                continue
+            try:
+                await self.bot.reload_extension(extension)
+                reloaded += 1
+            except Exception as e:
+                self.bot.logger.error('Failed to reload %s: %s', extension, e, exc_info=True)
+                failed[extension] = str(e)
+
+        return {
+            'status': 'error' if failed else 'ok',
+            'reloaded': reloaded,
+            'failed': failed,
+            'ms': (time.perf_counter() - start) * 1000
+        }
+
+    async def shutdown_locally(self, restart=False):
+        """Close this process shortly, leaving time to answer the broadcast
+
+        With restart, the process exits with RESTART_EXIT_CODE so cluster.py
+        starts it again.
+        """
+        if restart:
+            self.bot.exit_code = self.bot.RESTART_EXIT_CODE
+        if self.shutdown_task is None:
+            self.shutdown_task = asyncio.create_task(self.close_soon())
+        return {'status': 'ok'}
+
+    async def close_soon(self):
+        """Close the bot once the broadcast reply has had time to go out"""
+        await asyncio.sleep(1.0)
+        try:
+            await self.bot.close()
+        except Exception as e:
+            self.bot.logger.error('Shutdown failed: %s', e, exc_info=True)
 
     async def cog_autocomplete(self, interaction: discord.Interaction, current: str):
         """Autocomplete function for cog names"""
@@ -27,14 +113,16 @@ class Admin(commands.Cog):
         else:
             filtered_cogs = cog_names
 
-        # Return as app_commands.Choice objects (max 25)
+        # Return as app_commands.Choice objects (max 25), offering 'changed' first
+        choices = ['changed'] if current.lower() in 'changed' else []
         return [
             app_commands.Choice(name=name, value=name)
-            for name in sorted(filtered_cogs)[:25]
+            for name in (choices + sorted(filtered_cogs))[:25]
         ]
 
-    @app_commands.command(name='sync', description='Sync slash commands (Owner only)')
-    async def sync_commands(self, interaction: discord.Interaction):
+    @app_commands.command(name='sync', description='Sync slash commands (Owner only)', extras={'defer_ephemeral': True})
+    @app_commands.describe(force='Sync even if no command changed since the last sync')
+    async def sync_commands(self, interaction: discord.Interaction, force: bool = False):
         """Manually sync slash commands"""
         owner_id = getattr(self.bot, 'owner_id', None)
         if not owner_id or interaction.user.id != owner_id:
@@ -44,15 +132,221 @@ class Admin(commands.Cog):
         await interaction.response.defer(ephemeral=True)
 
         try:
-            synced = await self.bot.tree.sync()
-            await interaction.followup.send(f'✅ Successfully synced {len(synced)} commands', ephemeral=True)
-            self.bot.logger.info(f'Manual sync completed by {interaction.user}: {len(synced)} commands')
+            result = await self.bot.sync_commands(force=force)
+
+            changes = []
+            for label, key in (('➕ Added', 'added'), ('✏️ Changed', 'changed'), ('➖ Removed', 'removed')):
+                if result[key]:
+                    changes.append(f'**{label}:** ' + ', '.join(f'`/{name}`' for name in result[key]))
+            changes_text = '\n'.join(changes) if changes else 'No command changes since the last sync.'
+
+            if result['synced'] is None:
+                await interaction.followup.send(
+                    f'✅ Commands already up to date ({result["scope"]}), sync skipped.\n'
+                    f'Use `force: True` to sync anyway.',
+                    ephemeral=True
+                )
+                self.bot.logger.info('Manual sync by %s skipped: command tree unchanged', interaction.user)
+                return
+
+            await interaction.followup.send(
+                f'✅ Successfully synced {len(result["synced"])} commands ({result["scope"]})\n{changes_text}',
+                ephemeral=True
+            )
+            self.bot.logger.info('Manual sync completed by %s: %s commands', interaction.user, len(result['synced']))
         except Exception as e:
             await interaction.followup.send(f'❌ Failed to sync commands: {e}', ephemeral=True)
-            self.bot.logger.error(f'Manual sync failed: {e}', exc_info=True)
+            self.bot.logger.error('Manual sync failed: %s', e, exc_info=True)
+
+    @app_commands.command(name='startup', description='Show the startup profiling report (Owner only)', extras={'defer_ephemeral': True})
+    async def startup_report(self, interaction: discord.Interaction):
+        """Show per-phase and per-extension startup timings"""
+        owner_id = getattr(self.bot, 'owner_id', None)
+        if not owner_id or interaction.user.id != owner_id:
+            await interaction.response.send_message('❌ This command is restricted to the bot owner.', ephemeral=True)
+            return
+
+        report = self.bot.profiler.report()
+
+        embed = discord.Embed(
+            title='⏱️ Startup Report',
+            description=f'Total: **{report["total_ms"]:.0f}ms**' + ('' if self.bot.profiler.finished else ' (still starting)'),
+            color=discord.Color.blurple(),
+            timestamp=datetime.now(timezone.utc)
+        )
+
+        phases_text = '\n'.join(
+            f'`{name}`: {phase["duration_ms"]:.1f}ms' if phase['duration_ms'] is not None else f'`{name}`: running'
+            for name, phase in report['phases'].items()
+        )
+        embed.add_field(name='📋 Phases', value=phases_text or 'No phases recorded', inline=False)
+
+        extensions_text = '\n'.join(
+            f'`{name}`: {timing["total_ms"]:.1f}ms (import {timing["import_ms"]:.1f}ms)'
+            for name, timing in list(report['extensions'].items())[:10]
+        )
+        embed.add_field(name='🧩 Slowest Extensions (own time)', value=extensions_text or 'No extensions recorded', inline=False)
+
+        if self.bot.lazy_extension_stats:
+            lazy_text = '\n'.join(
+                f'`{name}`: {stats["total_ms"]:.1f}ms (import {stats["import_ms"]:.1f}ms)'
+                for name, stats in self.bot.lazy_extension_stats.items()
+            )
+            embed.add_field(name='💤 Lazily Loaded Since Startup', value=lazy_text, inline=False)
+
+        report_file = discord.File(io.BytesIO(json.dumps(report, indent=2).encode('utf-8')), filename='startup_report.json')
+        await interaction.response.send_message(embed=embed, file=report_file, ephemeral=True)
+
+    @app_commands.command(name='cache', description='Show cache profile and memory usage (Owner only)', extras={'defer_ephemeral': True})
+    async def cache_stats(self, interaction: discord.Interaction):
+        """Show what the member/message caches hold under the active cache profile"""
+        owner_id = getattr(self.bot, 'owner_id', None)
+        if not owner_id or interaction.user.id != owner_id:
+            await interaction.response.send_message('❌ This command is restricted to the bot owner.', ephemeral=True)
+            return
+
+        stats = self.bot.get_cache_stats()
+
+        embed = discord.Embed(
+            title='🗄️ Cache Usage',
+            description=f'Profile: **{stats["profile"]}** (set `CACHE_PROFILE` to full, balanced or minimal)',
+            color=discord.Color.blurple(),
+            timestamp=datetime.now(timezone.utc)
+        )
+        embed.add_field(name='🏰 Guilds', value=f'{stats["guilds"]} ({stats["chunked_guilds"]} chunked)', inline=True)
+        embed.add_field(name='👥 Members', value=str(stats['members']), inline=True)
+        embed.add_field(name='👤 Users', value=str(stats['users']), inline=True)
+        embed.add_field(
+            name='💬 Messages',
+            value=f'{stats["messages"]} / {stats["max_messages"]}' if stats['max_messages'] else 'Disabled',
+            inline=True
+        )
+        embed.add_field(name='🧠 Process Memory', value=format_bytes(stats['rss_bytes']), inline=True)
+
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    async def command_autocomplete(self, interaction: discord.Interaction, current: str):
+        """Autocomplete function for slash command names"""
+        names = sorted(command.qualified_name for command in self.bot.tree.walk_commands())
+        return [
+            app_commands.Choice(name=f'/{name}', value=name)
+            for name in names if current.lower().lstrip('/') in name.lower()
+        ][:25]
+
+    @app_commands.command(name='profile', description='Profile the next invocations of a command (Owner only)', extras={'defer_ephemeral': True})
+    @app_commands.describe(
+        command='The slash command to profile',
+        invocations='How many invocations to profile (default: 5)'
+    )
+    @app_commands.autocomplete(command=command_autocomplete)
+    async def profile_command(self, interaction: discord.Interaction, command: str,
+                              invocations: app_commands.Range[int, 1, 100] = 5):
+        """Run cProfile over the next invocations of a command and send the top functions as a file"""
+        owner_id = getattr(self.bot, 'owner_id', None)
+        if not owner_id or interaction.user.id != owner_id:
+            await interaction.response.send_message('❌ This command is restricted to the bot owner.', ephemeral=True)
+            return
+
+        command = command.lstrip('/')
+        if command not in {cmd.qualified_name for cmd in self.bot.tree.walk_commands()}:
+            await interaction.response.send_message(f'❌ Command `/{command}` not found.', ephemeral=True)
+            return
+
+        try:
+            session = self.bot.command_profiler.start(command, invocations)
+        except ValueError as e:
+            await interaction.response.send_message(f'❌ {e}', ephemeral=True)
+            return
+
+        worker_text = f' on worker {self.bot.cluster.worker_id}' if self.bot.cluster else ''
+        await interaction.response.send_message(
+            f'🔬 Profiling the next {invocations} invocation(s) of `/{command}`{worker_text}. '
+            f'The report is posted here when they finish, or after {self.PROFILE_TIMEOUT // 60} minutes.',
+            ephemeral=True
+        )
+        self.bot.logger.info('Profiling %s invocation(s) of /%s for %s', invocations, command, interaction.user)
+
+        # Waited for outside the command, so /profile itself isn't in flight (or timed) for minutes
+        task = asyncio.create_task(self.post_profile(interaction, command, session), name=f'profile /{command}')
+        self.profile_tasks.add(task)
+        task.add_done_callback(self.profile_tasks.discard)
+
+    async def post_profile(self, interaction, command, session):
+        """Wait for a profile session to finish (or time out) and post its report"""
+        current_span.set(None)  # The /profile command's trace is finished; don't add spans to it
+        try:
+            report = await asyncio.wait_for(asyncio.shield(session.done), timeout=self.PROFILE_TIMEOUT)
+        except asyncio.TimeoutError:
+            self.bot.command_profiler.stop(command)
+            report = session.done.result()
+        finally:
+            if not session.done.done():
+                self.bot.command_profiler.stop(command)  # Cancelled: don't leave the profiler running
+
+        report_file = discord.File(io.BytesIO(report.encode('utf-8')), filename=f'profile-{command.replace(" ", "-")}.txt')
+        try:
+            await interaction.followup.send(
+                f'🔬 Profile of `/{command}` over {session.collected} invocation(s)',
+                file=report_file,
+                ephemeral=True
+            )
+        except discord.HTTPException as e:
+            self.bot.logger.warning('Failed to post the /%s profile: %s', command, e)
+
+    @app_commands.command(name='memory', description='Trace allocations and report what grew (Owner only)', extras={'defer_ephemeral': True})
+    @app_commands.describe(action='start tracing, report growth since start and since the last report, or stop')
+    @app_commands.choices(action=[
+        app_commands.Choice(name='start', value='start'),
+        app_commands.Choice(name='report', value='report'),
+        app_commands.Choice(name='stop', value='stop')
+    ])
+    async def memory_command(self, interaction: discord.Interaction, action: app_commands.Choice[str]):
+        """Take tracemalloc snapshots and send allocation diffs and live view counts as a file"""
+        owner_id = getattr(self.bot, 'owner_id', None)
+        if not owner_id or interaction.user.id != owner_id:
+            await interaction.response.send_message('❌ This command is restricted to the bot owner.', ephemeral=True)
+            return
+
+        diagnostics = self.bot.memory_diagnostics
+        worker_text = f' on worker {self.bot.cluster.worker_id}' if self.bot.cluster else ''
+
+        if action.value == 'start':
+            if diagnostics.running:
+                await interaction.response.send_message('❌ Memory tracing is already running.', ephemeral=True)
+                return
+            diagnostics.start()
+            self.bot.logger.info('Memory tracing started by %s', interaction.user)
+            await interaction.response.send_message(
+                f'🧠 Memory tracing started{worker_text}. Use `/memory report` to see what grew; '
+                'allocations are slower until `/memory stop`.',
+                ephemeral=True
+            )
+            return
+
+        if not diagnostics.running:
+            await interaction.response.send_message('❌ Memory tracing is not running. Use `/memory start` first.', ephemeral=True)
+            return
+
+        if action.value == 'stop':
+            diagnostics.stop()
+            self.bot.logger.info('Memory tracing stopped by %s', interaction.user)
+            await interaction.response.send_message(f'🧠 Memory tracing stopped{worker_text}.', ephemeral=True)
+            return
+
+        # Snapshots and the gc walk take a while on a large heap
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        try:
+            report = await self.bot.loop.run_in_executor(None, diagnostics.report)
+        except RuntimeError as e:
+            diagnostics.stop()
+            await interaction.followup.send(f'❌ {e}. Use `/memory start` again.', ephemeral=True)
+            return
 
-    @app_commands.command(name='reload', description='Reload a specific cog (Owner only)')
-    @app_commands.describe(cog='The name of the cog to reload')
+        report_file = discord.File(io.BytesIO(report.encode('utf-8')), filename='memory-report.txt')
+        await interaction.followup.send(f'🧠 Memory report{worker_text}', file=report_file, ephemeral=True)
+
+    @app_commands.command(name='reload', description='Reload a specific cog (Owner only)', extras={'defer_ephemeral': True})
+    @app_commands.describe(cog='The name of the cog to reload, or "changed" for every cog changed on disk')
     @app_commands.autocomplete(cog=cog_autocomplete)
     async def reload_cog(self, interaction: discord.Interaction, cog: str):
         """Reload a specific cog"""
@@ -63,48 +357,120 @@ class Admin(commands.Cog):
 
         await interaction.response.defer(ephemeral=True)
 
+        if cog == 'changed':
+            await self.reload_changed(interaction)
+            return
+
         try:
-            # Try to reload the extension
-            await self.bot.reload_extension(f'cogs.{cog}')
-            await interaction.followup.send(f'✅ Successfully reloaded `{cog}`', ephemeral=True)
-            self.bot.logger.info(f'Cog {cog} reloaded by {interaction.user}')
-        except commands.ExtensionNotLoaded:
-            await interaction.followup.send(f'❌ Cog `{cog}` is not loaded.', ephemeral=True)
-        except commands.ExtensionNotFound:
-            await interaction.followup.send(f'❌ Cog `{cog}` not found.', ephemeral=True)
+            # Reload the extension in every process (just this one outside cluster mode)
+            results = await self.bot.broadcast('reload', extension=f'cogs.{cog}')
+            failures = [entry for entry in results if entry['result'].get('status') != 'ok']
+
+            if not failures:
+                workers_text = f' on {len(results)} workers' if self.bot.cluster else ''
+                await interaction.followup.send(f'✅ Successfully reloaded `{cog}`{workers_text}', ephemeral=True)
+                self.bot.logger.info('Cog %s reloaded by %s', cog, interaction.user)
+                return
+
+            lines = []
+            for entry in failures:
+                result = entry['result']
+                prefix = f'Worker {entry["worker"]}: ' if self.bot.cluster else ''
+                if result.get('status') == 'not_loaded':
+                    lines.append(f'{prefix}❌ Cog `{cog}` is not loaded.')
+                elif result.get('status') == 'not_found':
+                    lines.append(f'{prefix}❌ Cog `{cog}` not found.')
+                else:
+                    lines.append(f'{prefix}❌ Failed to reload `{cog}`: {result.get("error")}')
+            await interaction.followup.send('\n'.join(lines), ephemeral=True)
         except Exception as e:
             await interaction.followup.send(f'❌ Failed to reload `{cog}`: {e}', ephemeral=True)
-            self.bot.logger.error(f'Failed to reload cog {cog}: {e}', exc_info=True)
+            self.bot.logger.error('Failed to reload cog %s: %s', cog, e, exc_info=True)
+
+    async def reload_changed(self, interaction):
+        """Reload the cogs changed on disk in every process and report per-extension timings"""
+        try:
+            results = await self.bot.broadcast('reload_changed')
+        except Exception as e:
+            await interaction.followup.send(f'❌ Failed to reload changed cogs: {e}', ephemeral=True)
+            self.bot.logger.error('Failed to reload changed cogs: %s', e, exc_info=True)
+            return
+
+        lines = []
+        for entry in results:
+            prefix = f'Worker {entry["worker"]}: ' if self.bot.cluster else ''
+            if 'results' not in entry['result']:  # The worker didn't answer
+                lines.append(f'{prefix}❌ {entry["result"].get("error")}')
+                continue
+            if not entry['result']['results']:
+                lines.append(f'{prefix}✅ No cogs changed since they were loaded')
+                continue
+
+            for extension, result in sorted(entry['result']['results'].items()):
+                if result['status'] == 'ok':
+                    lines.append(f'{prefix}✅ `{extension}` reloaded in {result["ms"]:.0f}ms')
+                else:
+                    lines.append(f'{prefix}❌ `{extension}` {result["status"]}: {result.get("error", "")}')
 
-    @app_commands.command(name='restart', description='Restart the bot (Owner only)')
-    async def restart_bot(self, interaction: discord.Interaction):
-        """Restart the bot process"""
+        self.bot.logger.info('Changed cogs reloaded by %s', interaction.user)
+        await interaction.followup.send('\n'.join(lines)[:2000], ephemeral=True)
+
+    @app_commands.command(name='restart', description='Reload every cog in place; use full to pick up bot.py or utils/ changes (Owner only)', extras={'defer_ephemeral': True})
+    @app_commands.describe(full='Restart the whole process; needed for changes outside the cogs (bot.py, utils/)')
+    async def restart_bot(self, interaction: discord.Interaction, full: bool = False):
+        """Reload every cog without dropping the gateway session, or restart the process
+
+        The in-place reload only re-imports extensions: bot.py and utils/ modules
+        keep the code they were started with until a full restart.
+        """
         owner_id = getattr(self.bot, 'owner_id', None)
         if not owner_id or interaction.user.id != owner_id:
             await interaction.response.send_message('❌ This command is restricted to the bot owner.', ephemeral=True)
             return
 
-        await interaction.response.send_message('🔄 Restarting bot...', ephemeral=True)
-        self.bot.logger.info(f'Bot restart initiated by {interaction.user}')
+        if full:
+            await interaction.response.send_message('🔄 Restarting bot...', ephemeral=True)
+            self.bot.logger.info('Bot restart initiated by %s', interaction.user)
 
-        # Restart the bot process
-        try:
-            # Save the current working directory
-            original_cwd = os.getcwd()
+            if self.bot.cluster:
+                # Every worker exits with the restart code and cluster.py starts it again
+                await self.bot.broadcast('shutdown', restart=True)
+                return
 
-            # Close the bot connection gracefully
+            # run.py starts a fresh process (with its path setup) when it sees the restart code
+            self.bot.exit_code = self.bot.RESTART_EXIT_CODE
             await self.bot.close()
+            return
+
+        await interaction.response.defer(ephemeral=True)
+        self.bot.logger.info('In-place restart initiated by %s', interaction.user)
 
-            # Change to the parent directory where bot.py is located
-            if os.path.basename(original_cwd) == 'src':
-                os.chdir('..')
+        try:
+            results = await self.bot.broadcast('reload_all')
+
+            lines = []
+            for entry in results:
+                result = entry['result']
+                prefix = f'Worker {entry["worker"]}: ' if self.bot.cluster else ''
+                if 'reloaded' not in result:  # The worker didn't answer
+                    lines.append(f'{prefix}❌ {result.get("error")}')
+                    continue
+                lines.append(f'{prefix}🔄 Reloaded {result["reloaded"]} extension(s) in {result["ms"]:.0f}ms')
+                for extension, error in result['failed'].items():
+                    lines.append(f'{prefix}❌ `{extension}`: {error}')
+
+            # Reloaded cogs may have changed their commands; this is a no-op when they didn't
+            sync = await self.bot.sync_commands()
+            if sync['synced'] is not None:
+                lines.append(f'✅ Synced {len(sync["synced"])} commands ({sync["scope"]})')
+            lines.append('ℹ️ Only cogs were reloaded; use `full:True` for changes to bot.py or utils/')
 
-            # Restart the process
-            os.execv(sys.executable, [sys.executable, 'bot.py'])
+            await interaction.followup.send('\n'.join(lines), ephemeral=True)
         except Exception as e:
-            self.bot.logger.error(f'Failed to restart bot: {e}', exc_info=True)
+            await interaction.followup.send(f'❌ Failed to restart: {e}', ephemeral=True)
+            self.bot.logger.error('In-place restart failed: %s', e, exc_info=True)
 
-    @app_commands.command(name='shutdown', description='Shutdown the bot (Owner only)')
+    @app_commands.command(name='shutdown', description='Shutdown the bot (Owner only)', extras={'defer_ephemeral': True})
     async def shutdown(self, interaction: discord.Interaction):
         """Shutdown the bot"""
         owner_id = getattr(self.bot, 'owner_id', None)
@@ -113,7 +479,13 @@ class Admin(commands.Cog):
             return
 
         await interaction.response.send_message('👋 Shutting down bot...', ephemeral=True)
-        self.bot.logger.info(f'Bot shutdown initiated by {interaction.user}')
+        self.bot.logger.info('Bot shutdown initiated by %s', interaction.user)
+
+        if self.bot.cluster:
+            # Take every worker down, not just the one that received the command
+            await self.bot.broadcast('shutdown')
+            return
+
         await self.bot.close()
 
 
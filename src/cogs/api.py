@@ -2,15 +2,28 @@ import discord
 from discord import app_commands
 from discord.ext import commands
 from datetime import datetime, timezone
-import aiohttp
 import random
 
+from utils.http import client_session
+from utils.coins import CoinDirectory, PriceService, CoinGeckoError, ID_PREFIX
+from utils.ratelimit import rate_limit
+
 
 class API(commands.Cog):
     """Commands that use external APIs"""
 
     def __init__(self, bot):
         self.bot = bot
+        self.coins = CoinDirectory(bot.storage)  # Resolves /crypto input without a search request
+        self.prices = PriceService()
+
+    async def cog_load(self):
+        """Load the coin index and keep it fresh in the background"""
+        self.coins.start()
+
+    async def cog_unload(self):
+        self.coins.stop()
+        self.prices.close()
 
     async def language_autocomplete(self, interaction: discord.Interaction, current: str):
         """Autocomplete function for translation languages"""
@@ -33,123 +46,142 @@ class API(commands.Cog):
             for lang in sorted(filtered_langs)[:25]
         ]
 
+    async def coin_autocomplete(self, interaction: discord.Interaction, current: str):
+        """Autocomplete coins from the local index, highest market cap first (no network calls)"""
+        choices = []
+        for coin in self.coins.search(current, limit=25):
+            rank = f' #{coin.rank}' if coin.rank else ''
+            name = f'{coin.name} ({coin.symbol.upper()}){rank}'
+            # Prefixed so resolve() takes it as this exact coin, not as typed text
+            choices.append(app_commands.Choice(name=name[:100], value=f'{ID_PREFIX}{coin.id}'[:100]))
+        return choices
+
     @app_commands.command(name='crypto', description='Get cryptocurrency price information')
+    @rate_limit(per_user=(5, 30), total=(25, 60))  # At most one CoinGecko call each, often shared
     @app_commands.describe(coin='Cryptocurrency name or symbol (e.g., "bitcoin", "ethereum", "btc", "eth")')
+    @app_commands.autocomplete(coin=coin_autocomplete)
     async def crypto_price(self, interaction: discord.Interaction, coin: str):
         """Get cryptocurrency price and information"""
         await interaction.response.defer()
 
         # Clean up the coin input
         coin = coin.lower().strip()
+        query = coin.removeprefix(ID_PREFIX)  # For the search fallback and messages; resolve() takes the prefix
+        not_found = f"❌ Cryptocurrency '{query}' not found. Try using the full name or common symbol (e.g., 'bitcoin', 'ethereum', 'btc', 'eth')."
 
         try:
-            async with aiohttp.ClientSession() as session:
-                # First, search for the coin to get the correct ID
-                search_url = f"https://api.coingecko.com/api/v3/search?query={coin}"
-
-                async with session.get(search_url) as response:
-                    if response.status == 200:
-                        search_data = await response.json()
-                        coins = search_data.get('coins', [])
-
-                        if not coins:
-                            await interaction.followup.send(f"❌ Cryptocurrency '{coin}' not found. Try using the full name or common symbol (e.g., 'bitcoin', 'ethereum', 'btc', 'eth').")
+            if self.coins.index is not None:
+                match = self.coins.resolve(coin)
+                if match is None:
+                    await interaction.followup.send(not_found)
+                    return
+                coin_id, coin_name, coin_symbol = match.id, match.name, match.symbol.upper()
+            else:
+                # The coin index hasn't loaded yet (first start): resolve with a search request
+                async with client_session() as session:
+                    async with session.get("https://api.coingecko.com/api/v3/search", params={'query': query}) as response:
+                        if response.status != 200:
+                            await interaction.followup.send("❌ Failed to search for cryptocurrency. Please try again later.")
                             return
+                        coins = (await response.json()).get('coins', [])
 
-                        # Get the first match (most relevant)
-                        coin_id = coins[0]['id']
-                        coin_name = coins[0]['name']
-                        coin_symbol = coins[0]['symbol'].upper()
+                if not coins:
+                    await interaction.followup.send(not_found)
+                    return
 
-                        # Get detailed price information
-                        price_url = f"https://api.coingecko.com/api/v3/simple/price?ids={coin_id}&vs_currencies=usd&include_market_cap=true&include_24hr_vol=true&include_24hr_change=true&include_last_updated_at=true"
+                # Get the first match (most relevant)
+                coin_id = coins[0]['id']
+                coin_name = coins[0]['name']
+                coin_symbol = coins[0]['symbol'].upper()
 
-                        async with session.get(price_url) as price_response:
-                            if price_response.status == 200:
-                                price_data = await price_response.json()
+            # Batched with other /crypto invocations and cached briefly (see PriceService)
+            try:
+                data = await self.prices.get(coin_id)
+            except CoinGeckoError:
+                await interaction.followup.send("❌ Failed to fetch price data. Please try again later.")
+                return
 
-                                if coin_id not in price_data:
-                                    await interaction.followup.send("❌ Price data not available for this cryptocurrency.")
-                                    return
+            if data is None:
+                await interaction.followup.send("❌ Price data not available for this cryptocurrency.")
+                return
 
-                                data = price_data[coin_id]
-
-                                # Format price
-                                price = data['usd']
-                                if price >= 1:
-                                    price_str = f"${price:,.2f}"
-                                elif price >= 0.01:
-                                    price_str = f"${price:.4f}"
-                                else:
-                                    price_str = f"${price:.8f}"
-
-                                # Format market cap
-                                market_cap = data.get('usd_market_cap')
-                                if market_cap:
-                                    if market_cap >= 1e12:
-                                        market_cap_str = f"${market_cap/1e12:.2f}T"
-                                    elif market_cap >= 1e9:
-                                        market_cap_str = f"${market_cap/1e9:.2f}B"
-                                    elif market_cap >= 1e6:
-                                        market_cap_str = f"${market_cap/1e6:.2f}M"
-                                    else:
-                                        market_cap_str = f"${market_cap:,.0f}"
-                                else:
-                                    market_cap_str = "N/A"
-
-                                # Format 24h volume
-                                volume = data.get('usd_24h_vol')
-                                if volume:
-                                    if volume >= 1e9:
-                                        volume_str = f"${volume/1e9:.2f}B"
-                                    elif volume >= 1e6:
-                                        volume_str = f"${volume/1e6:.2f}M"
-                                    else:
-                                        volume_str = f"${volume:,.0f}"
-                                else:
-                                    volume_str = "N/A"
-
-                                # 24h change
-                                change_24h = data.get('usd_24h_change', 0)
-                                change_emoji = "📈" if change_24h >= 0 else "📉"
-                                change_color = discord.Color.green() if change_24h >= 0 else discord.Color.red()
-
-                                embed = discord.Embed(
-                                    title=f"💰 {coin_name} ({coin_symbol})",
-                                    color=change_color,
-                                    timestamp=datetime.now(timezone.utc)
-                                )
-
-                                embed.add_field(name="💵 Price", value=price_str, inline=True)
-                                embed.add_field(name=f"{change_emoji} 24h Change", value=f"{change_24h:+.2f}%", inline=True)
-                                embed.add_field(name="📊 Market Cap", value=market_cap_str, inline=True)
-                                embed.add_field(name="📈 24h Volume", value=volume_str, inline=True)
-
-                                # Add trend indicator
-                                if abs(change_24h) >= 10:
-                                    trend = "🚀 Mooning!" if change_24h > 0 else "💥 Crashing!"
-                                elif abs(change_24h) >= 5:
-                                    trend = "📈 Strong move" if change_24h > 0 else "📉 Strong drop"
-                                else:
-                                    trend = "📊 Stable"
-
-                                embed.add_field(name="🎯 Trend", value=trend, inline=True)
-
-                                # Add disclaimer
-                                embed.add_field(name="⚠️ Disclaimer", value="This is not financial advice. DYOR!", inline=False)
-
-                                embed.set_footer(text=f"Requested by {interaction.user} • Data from CoinGecko", icon_url=interaction.user.avatar.url if interaction.user.avatar else None)
-
-                                await interaction.followup.send(embed=embed)
-                            else:
-                                await interaction.followup.send("❌ Failed to fetch price data. Please try again later.")
-                    else:
-                        await interaction.followup.send("❌ Failed to search for cryptocurrency. Please try again later.")
+            embed = self.create_crypto_embed(interaction, coin_name, coin_symbol, data)
+            await interaction.followup.send(embed=embed)
 
         except Exception as e:
             await interaction.followup.send("❌ Error fetching cryptocurrency data. Please try again later.")
 
+    def create_crypto_embed(self, interaction, coin_name, coin_symbol, data):
+        """Price, 24h change, market cap and volume of one coin"""
+        # Format price
+        price = data['usd']
+        if price >= 1:
+            price_str = f"${price:,.2f}"
+        elif price >= 0.01:
+            price_str = f"${price:.4f}"
+        else:
+            price_str = f"${price:.8f}"
+
+        # Format market cap
+        market_cap = data.get('usd_market_cap')
+        if market_cap:
+            if market_cap >= 1e12:
+                market_cap_str = f"${market_cap/1e12:.2f}T"
+            elif market_cap >= 1e9:
+                market_cap_str = f"${market_cap/1e9:.2f}B"
+            elif market_cap >= 1e6:
+                market_cap_str = f"${market_cap/1e6:.2f}M"
+            else:
+                market_cap_str = f"${market_cap:,.0f}"
+        else:
+            market_cap_str = "N/A"
+
+        # Format 24h volume
+        volume = data.get('usd_24h_vol')
+        if volume:
+            if volume >= 1e9:
+                volume_str = f"${volume/1e9:.2f}B"
+            elif volume >= 1e6:
+                volume_str = f"${volume/1e6:.2f}M"
+            else:
+                volume_str = f"${volume:,.0f}"
+        else:
+            volume_str = "N/A"
+
+        # 24h change
+        change_24h = data.get('usd_24h_change', 0)
+        change_emoji = "📈" if change_24h >= 0 else "📉"
+        change_color = discord.Color.green() if change_24h >= 0 else discord.Color.red()
+
+        embed = discord.Embed(
+            title=f"💰 {coin_name} ({coin_symbol})",
+            color=change_color,
+            timestamp=datetime.now(timezone.utc)
+        )
+
+        embed.add_field(name="💵 Price", value=price_str, inline=True)
+        embed.add_field(name=f"{change_emoji} 24h Change", value=f"{change_24h:+.2f}%", inline=True)
+        embed.add_field(name="📊 Market Cap", value=market_cap_str, inline=True)
+        embed.add_field(name="📈 24h Volume", value=volume_str, inline=True)
+
+        # Add trend indicator
+        if abs(change_24h) >= 10:
+            trend = "🚀 Mooning!" if change_24h > 0 else "💥 Crashing!"
+        elif abs(change_24h) >= 5:
+            trend = "📈 Strong move" if change_24h > 0 else "📉 Strong drop"
+        else:
+            trend = "📊 Stable"
+
+        embed.add_field(name="🎯 Trend", value=trend, inline=True)
+
+        # Add disclaimer
+        embed.add_field(name="⚠️ Disclaimer", value="This is not financial advice. DYOR!", inline=False)
+
+        embed.set_footer(text=f"Requested by {interaction.user} • Data from CoinGecko", icon_url=interaction.user.avatar.url if interaction.user.avatar else None)
+        return embed
+
     @app_commands.command(name='translate', description='Translate text to another language')
+    @rate_limit(per_user=(5, 30), total=(60, 60))
     @app_commands.describe(
         text='The text to translate',
         target_language='Target language (e.g., "spanish", "french", "japanese", "auto" to detect)'
@@ -250,7 +282,7 @@ class API(commands.Cog):
         detected_source = detect_language(text)
 
         try:
-            async with aiohttp.ClientSession() as session:
+            async with client_session() as session:
                 # MyMemory API endpoint with explicit language pair
                 url = "https://api.mymemory.translated.net/get"
                 params = {
@@ -299,6 +331,7 @@ class API(commands.Cog):
             await interaction.followup.send(f"❌ Error during translation: {str(e)}")
 
     @app_commands.command(name='meme', description='Get a random meme from Reddit')
+    @rate_limit(per_user=(5, 30), per_guild=(20, 60))
     async def random_meme(self, interaction: discord.Interaction):
         """Get a random meme from popular subreddits"""
         await interaction.response.defer()
@@ -307,7 +340,7 @@ class API(commands.Cog):
         subreddits = ['memes', 'dankmemes', 'wholesomememes', 'programmerhumor', 'funny']
 
         try:
-            async with aiohttp.ClientSession() as session:
+            async with client_session() as session:
                 # Try each subreddit until we get a good meme
                 for subreddit in subreddits:
                     try:
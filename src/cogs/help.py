@@ -42,7 +42,8 @@ class Help(commands.Cog):
 
         # Weather Commands
         weather_commands = [
-            "`/weather <location>` - Interactive weather information with forecasts, air quality, and more"
+            "`/weather <location>` - Interactive weather information with forecasts, air quality, and more",
+            "`/weather-route <origin> <destination> [speed]` - Expected conditions along a road trip"
         ]
         embed.add_field(name="🌤️ Weather Commands", value="\n".join(weather_commands), inline=False)
 
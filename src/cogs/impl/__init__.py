@@ -0,0 +1 @@
+# Implementations of lazily loaded cogs (see utils/lazy.py)
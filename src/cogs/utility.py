@@ -5,14 +5,82 @@ from discord import app_commands
 from discord.ext import commands
 import asyncio
 import os
+import time
 import aiohttp
 
+from utils.storage import StorageError
+
 
 class Utility(commands.Cog):
     """Utility commands for bot and server information"""
 
     def __init__(self, bot):
         self.bot = bot
+        self.timers = {}  # Timer id -> {'channel_id', 'user_id', 'ends_at' (unix time), 'duration'}
+        self.timer_tasks = {}  # Timer id -> task sleeping until the timer ends
+
+    async def cog_load(self):
+        """Answer stats broadcasts so /botinfo can aggregate across cluster workers, and resume timers"""
+        self.bot.register_ipc_handler('stats', self.get_local_stats)
+
+        for timer_id, timer in (await self.bot.storage.items(self.timers_namespace)).items():
+            self.start_timer(timer_id, timer)
+
+    async def cog_unload(self):
+        """Stop the timer tasks; timers stay in storage, so the next process (or reloaded cog) finishes them"""
+        for task in self.timer_tasks.values():
+            task.cancel()
+        self.timer_tasks.clear()
+        self.timers.clear()
+
+    @property
+    def timers_namespace(self):
+        """Storage namespace for pending timers; cluster workers each keep their own"""
+        if self.bot.cluster:
+            return f'timers.worker{self.bot.cluster.worker_id}'
+        return 'timers'
+
+    def start_timer(self, timer_id, timer):
+        """Schedule a timer's notification"""
+        self.timers[timer_id] = timer
+        self.timer_tasks[timer_id] = asyncio.create_task(self.run_timer(timer_id, timer), name=f'timer {timer_id}')
+
+    async def run_timer(self, timer_id, timer):
+        """Sleep until a timer ends, then ping its owner in the channel it was started from"""
+        try:
+            await asyncio.sleep(max(0.0, timer['ends_at'] - time.time()))
+            await self.bot.wait_until_ready()
+
+            finish_embed = discord.Embed(
+                title="⏰ Timer Finished!",
+                description=f"Your **{timer['duration']}** timer is complete!",
+                color=discord.Color.green(),
+                timestamp=datetime.now(timezone.utc)
+            )
+            # The channel rather than the interaction followup: followup tokens expire after 15 minutes
+            channel = self.bot.get_partial_messageable(timer['channel_id'])
+            await channel.send(f"<@{timer['user_id']}>", embed=finish_embed)
+        except discord.HTTPException as e:
+            self.bot.logger.warning('Failed to deliver timer %s: %s', timer_id, e)
+        finally:
+            # A task cancelled by cog_unload is no longer registered, and its timer stays stored
+            if self.timer_tasks.get(timer_id) is asyncio.current_task():
+                del self.timer_tasks[timer_id]
+                del self.timers[timer_id]
+                try:
+                    await self.bot.storage.delete(self.timers_namespace, timer_id)
+                except StorageError as e:
+                    # Storage closed or failing: the timer is delivered again after the next start
+                    self.bot.logger.warning('Failed to remove delivered timer %s from storage: %s', timer_id, e)
+
+    async def get_local_stats(self):
+        """Guild, user and shard counts for this process"""
+        return {
+            'guilds': len(self.bot.guilds),
+            'users': len(self.bot.users),
+            'shards': sorted(self.bot.shards.keys()),
+            'latency': self.bot.latency
+        }
 
     @app_commands.command(name='ping', description='Check the bot\'s latency and response time')
     async def ping(self, interaction: discord.Interaction):
@@ -33,6 +101,14 @@ class Utility(commands.Cog):
         )
         embed.add_field(name="API Latency", value=f"{api_latency}ms", inline=True)
         embed.add_field(name="Response Time", value=f"{response_time}ms", inline=True)
+
+        lag = self.bot.lag_monitor.percentiles()
+        if lag:
+            embed.add_field(
+                name="Event Loop Lag",
+                value=f"p50 {lag['p50']:.1f}ms · p95 {lag['p95']:.1f}ms · p99 {lag['p99']:.1f}ms · max {lag['max']:.1f}ms",
+                inline=False
+            )
         embed.set_footer(text=f"Requested by {interaction.user}", icon_url=interaction.user.avatar.url if interaction.user.avatar else None)
 
         await interaction.edit_original_response(content=None, embed=embed)
@@ -40,6 +116,11 @@ class Utility(commands.Cog):
     @app_commands.command(name='botinfo', description='Display information about the bot')
     async def botinfo(self, interaction: discord.Interaction):
         """Display information about the bot"""
+        if self.bot.cluster:
+            await interaction.response.defer()  # Gathering stats from every worker takes a round trip
+
+        results = [entry['result'] for entry in await self.bot.broadcast('stats') if 'error' not in entry['result']]
+
         embed = discord.Embed(
             title="🤖 Bot Information",
             description="Oyasumi - A modern Discord bot for 2025",
@@ -48,10 +129,14 @@ class Utility(commands.Cog):
         )
 
         # Bot stats
-        embed.add_field(name="📊 Servers", value=str(len(self.bot.guilds)), inline=True)
-        embed.add_field(name="👥 Users", value=str(len(self.bot.users)), inline=True)
+        embed.add_field(name="📊 Servers", value=str(sum(result['guilds'] for result in results)), inline=True)
+        embed.add_field(name="👥 Users", value=str(sum(result['users'] for result in results)), inline=True)
         embed.add_field(name="⏰ Uptime", value=self.get_uptime(), inline=True)
 
+        if self.bot.cluster:
+            shard_total = sum(len(result['shards']) for result in results)
+            embed.add_field(name="🧩 Cluster", value=f"{shard_total} shards across {len(results)} workers", inline=True)
+
         # System info
         embed.add_field(name="🐍 Python", value=platform.python_version(), inline=True)
         embed.add_field(name="📚 Discord.py", value=discord.__version__, inline=True)
@@ -60,7 +145,10 @@ class Utility(commands.Cog):
         embed.set_thumbnail(url=self.bot.user.avatar.url if self.bot.user.avatar else None)
         embed.set_footer(text="Made with ❤️ using Discord.py")
 
-        await interaction.response.send_message(embed=embed)
+        if interaction.response.is_done():
+            await interaction.followup.send(embed=embed)
+        else:
+            await interaction.response.send_message(embed=embed)
 
     @app_commands.command(name='serverinfo', description='Display information about the current server')
     async def server_info(self, interaction: discord.Interaction):
@@ -71,6 +159,12 @@ class Utility(commands.Cog):
 
         guild = interaction.guild
 
+        # With a lean cache profile the owner may not be cached; acknowledge before fetching them
+        owner = guild.owner
+        if owner is None:
+            await interaction.response.defer()
+            owner = await self.bot.get_or_fetch_member(guild, guild.owner_id)
+
         embed = discord.Embed(
             title=f"🏰 {guild.name}",
             color=discord.Color.blue(),
@@ -78,7 +172,7 @@ class Utility(commands.Cog):
         )
 
         # Server stats
-        embed.add_field(name="👑 Owner", value=guild.owner.mention if guild.owner else "Unknown", inline=True)
+        embed.add_field(name="👑 Owner", value=owner.mention if owner else "Unknown", inline=True)
         embed.add_field(name="📅 Created", value=guild.created_at.strftime("%B %d, %Y"), inline=True)
         embed.add_field(name="🆔 Server ID", value=guild.id, inline=True)
 
@@ -90,10 +184,17 @@ class Utility(commands.Cog):
         embed.add_field(name="👤 Roles", value=len(guild.roles), inline=True)
         embed.add_field(name="😀 Emojis", value=len(guild.emojis), inline=True)
 
+        if guild.chunked:
+            bot_count = sum(1 for member in guild.members if member.bot)
+            embed.add_field(name="🤖 Bots", value=bot_count, inline=True)
+
         if guild.icon:
             embed.set_thumbnail(url=guild.icon.url)
 
-        await interaction.response.send_message(embed=embed)
+        if interaction.response.is_done():
+            await interaction.followup.send(embed=embed)
+        else:
+            await interaction.response.send_message(embed=embed)
 
     @app_commands.command(name='userinfo', description='Display information about a user')
     @app_commands.describe(member='The user to get information about (defaults to yourself)')
@@ -102,6 +203,11 @@ class Utility(commands.Cog):
         if member is None:
             member = interaction.user
 
+        # Outside the member cache the target may arrive as a plain User; acknowledge, then fetch just that member
+        if interaction.guild and not isinstance(member, discord.Member):
+            await interaction.response.defer()
+            member = await self.bot.get_or_fetch_member(interaction.guild, member.id) or member
+
         embed = discord.Embed(
             title=f"👤 {member.display_name}",
             color=member.color if member.color != discord.Color.default() else discord.Color.blue(),
@@ -121,7 +227,10 @@ class Utility(commands.Cog):
         if member.avatar:
             embed.set_thumbnail(url=member.avatar.url)
 
-        await interaction.response.send_message(embed=embed)
+        if interaction.response.is_done():
+            await interaction.followup.send(embed=embed)
+        else:
+            await interaction.response.send_message(embed=embed)
 
     @app_commands.command(name='avatar', description='Display a user\'s avatar')
     @app_commands.describe(member='The user whose avatar to display (defaults to yourself)')
@@ -143,7 +252,7 @@ class Utility(commands.Cog):
 
         await interaction.response.send_message(embed=embed)
 
-    @app_commands.command(name='checkowner', description='Check if you are recognized as the bot owner')
+    @app_commands.command(name='checkowner', description='Check if you are recognized as the bot owner', extras={'defer_ephemeral': True})
     async def check_owner(self, interaction: discord.Interaction):
         """Check if the user is the bot owner"""
         owner_id = getattr(self.bot, 'owner_id', None)
@@ -186,7 +295,7 @@ class Utility(commands.Cog):
 
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
-    @app_commands.command(name='clear', description='Clear a specified number of messages from the chat')
+    @app_commands.command(name='clear', description='Clear a specified number of messages from the chat', extras={'defer_ephemeral': True})
     @app_commands.describe(amount='Number of messages to delete (1-100, default: 10)')
     @app_commands.default_permissions(manage_messages=True)
     async def clear_messages(self, interaction: discord.Interaction, amount: int = 10):
@@ -371,18 +480,16 @@ class Utility(commands.Cog):
 
             await interaction.response.send_message(embed=embed)
 
-            # Start the timer
-            await asyncio.sleep(total_seconds)
-
-            # Timer finished
-            finish_embed = discord.Embed(
-                title="⏰ Timer Finished!",
-                description=f"Your **{duration_display}** timer is complete!",
-                color=discord.Color.green(),
-                timestamp=datetime.now(timezone.utc)
-            )
-
-            await interaction.followup.send(f"{interaction.user.mention}", embed=finish_embed)
+            # Stored first so the timer survives a crash or restart, then run in the background
+            # so the command finishes (and never holds up a drain)
+            timer_id, timer = str(interaction.id), {
+                'channel_id': interaction.channel_id,
+                'user_id': interaction.user.id,
+                'ends_at': time.time() + total_seconds,
+                'duration': duration_display
+            }
+            await self.bot.storage.set(self.timers_namespace, timer_id, timer)
+            self.start_timer(timer_id, timer)
 
         except ValueError as e:
             await interaction.response.send_message(
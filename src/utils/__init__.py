@@ -0,0 +1 @@
+# Shared helpers for Oyasumi Discord Bot
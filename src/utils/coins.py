@@ -0,0 +1,346 @@
+import json
+import time
+import heapq
+import random
+import asyncio
+import logging
+from bisect import bisect_left
+from collections import defaultdict
+from typing import NamedTuple, Optional
+
+import aiohttp
+
+from utils.http import client_session
+from utils.metrics import metrics
+
+# A local copy of CoinGecko's coin list, so /crypto resolves "btc" to
+# "bitcoin" without a /search request. The list (~15k coins) is combined with
+# the market-cap ranks of the top coins, kept in storage so a restart doesn't
+# refetch it, and refreshed in the background every REFRESH_INTERVAL. Cluster
+# workers share the stored list: a worker whose copy is due first checks
+# whether another one already refreshed it, and REFRESH_JITTER spreads their
+# checks so usually only one of them fetches. The ~1 MB of JSON is encoded and
+# decoded in an executor along with the index build.
+#
+# Prices go through PriceService: ids requested within PRICE_BATCH_WINDOW of
+# each other share one /simple/price call, results are cached for PRICE_TTL,
+# and callers asking for a coin already being fetched wait for that request.
+
+COINGECKO_API = 'https://api.coingecko.com/api/v3'
+REFRESH_INTERVAL = 6 * 60 * 60  # Seconds between coin list refreshes
+RETRY_INTERVAL = 5 * 60  # Seconds before retrying a failed refresh
+REFRESH_JITTER = 5 * 60  # Up to this many random seconds are added to each refresh delay
+RANKED_PAGES = 4  # /coins/markets pages of 250 fetched for market-cap ranks (top 1000)
+STORAGE_NAMESPACE = 'coins'
+AUTOCOMPLETE_LIMIT = 25  # Discord shows at most 25 choices
+MEMO_PREFIX_LENGTH = 2  # Results for prefixes up to this long are kept per index
+ID_PREFIX = 'id:'  # Marks an autocomplete value as a coin id, so it can't be mistaken for typed text
+
+PRICE_BATCH_WINDOW = 0.05  # Seconds a price request waits for others to join its batch
+PRICE_TTL = 30  # Seconds a fetched price is served from the cache
+PRICE_BATCH_SIZE = 100  # Most ids per /simple/price call
+PRICE_FIELDS = {
+    'vs_currencies': 'usd',
+    'include_market_cap': 'true',
+    'include_24hr_vol': 'true',
+    'include_24hr_change': 'true',
+    'include_last_updated_at': 'true'
+}
+
+cache_requests = metrics.counter(
+    'oyasumi_cache_requests_total',
+    'Cache lookups by cache and result (hit or miss)',
+    labels=('cache', 'result')
+)
+price_batch_size = metrics.histogram(
+    'oyasumi_price_batch_ids',
+    'Coin ids per batched CoinGecko price request',
+    buckets=(1, 2, 5, 10, 25, 50, 100)
+)
+
+logger = logging.getLogger('bot.coins')
+
+
+class CoinGeckoError(Exception):
+    """Raised when a CoinGecko request returns a non-200 response"""
+
+
+class Coin(NamedTuple):
+    id: str
+    symbol: str
+    name: str
+    rank: Optional[int]  # Market-cap rank, None outside the top RANKED_PAGES * 250
+
+
+def rank_key(coin):
+    """Sort key putting the highest market cap first and unranked coins last"""
+    return (coin.rank is None, coin.rank or 0)
+
+
+class CoinIndex:
+    """Immutable lookup tables over the coin list; rebuilt, not updated, on refresh"""
+
+    def __init__(self, coins):
+        self.by_id = {}
+        by_symbol = defaultdict(list)
+        by_name = defaultdict(list)
+        keys = set()
+        for coin in coins:
+            coin = Coin(*coin)
+            symbol, name = coin.symbol.lower(), coin.name.lower()
+            self.by_id[coin.id] = coin
+            by_symbol[symbol].append(coin)
+            by_name[name].append(coin)
+            keys.update(((coin.id, coin.id), (symbol, coin.id), (name, coin.id)))
+
+        # Symbols and names collide (dozens of coins use "uni"): the highest market cap wins
+        self.by_symbol = {symbol: sorted(matches, key=rank_key) for symbol, matches in by_symbol.items()}
+        self.by_name = {name: sorted(matches, key=rank_key) for name, matches in by_name.items()}
+
+        # Sorted (lowercase key, coin id) pairs; a prefix's matches are one contiguous slice
+        self.prefix_entries = sorted(keys)
+        self.prefix_keys = [key for key, _ in self.prefix_entries]
+        self.top_matches = {}  # Short prefix -> its best AUTOCOMPLETE_LIMIT matches, filled on first use
+        self.search('')  # The empty prefix ranks every coin, so pay for it while building (off the loop)
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def search(self, prefix, limit=25):
+        """Coins whose id, symbol or name starts with prefix, highest market cap first"""
+        prefix = prefix.lower().strip()
+        if len(prefix) <= MEMO_PREFIX_LENGTH and limit <= AUTOCOMPLETE_LIMIT:
+            # One or two characters match thousands of keys; rank them once per index
+            matches = self.top_matches.get(prefix)
+            if matches is None:
+                matches = self.top_matches[prefix] = self.rank_prefix(prefix, AUTOCOMPLETE_LIMIT)
+            return matches[:limit]
+        return self.rank_prefix(prefix, limit)
+
+    def rank_prefix(self, prefix, limit):
+        start = bisect_left(self.prefix_keys, prefix)
+        end = bisect_left(self.prefix_keys, prefix + '\U0010ffff', start)
+        ids = {coin_id for _, coin_id in self.prefix_entries[start:end]}
+        return heapq.nsmallest(limit, (self.by_id[coin_id] for coin_id in ids), key=rank_key)
+
+    def resolve(self, query):
+        """The coin a user most likely means
+
+        An autocomplete value (ID_PREFIX + coin id) is exactly that coin. Typed
+        text matching several coins' ids, symbols or names exactly resolves to the
+        highest market cap among them; otherwise the best prefix match wins.
+        """
+        query = query.lower().strip()
+        if query.startswith(ID_PREFIX):
+            return self.by_id.get(query[len(ID_PREFIX):])
+        if not query:
+            return None
+
+        # min() keeps the first of equally ranked candidates, so an exact id wins ties
+        candidates = [self.by_id[query]] if query in self.by_id else []
+        candidates.extend(self.by_symbol.get(query, [])[:1])
+        candidates.extend(self.by_name.get(query, [])[:1])
+        if candidates:
+            return min(candidates, key=rank_key)
+
+        matches = self.search(query, limit=1)
+        return matches[0] if matches else None
+
+
+class CoinDirectory:
+    """Keeps a CoinIndex loaded and fresh; index is None until the first load succeeds"""
+
+    def __init__(self, storage, refresh_interval=REFRESH_INTERVAL):
+        self.storage = storage
+        self.refresh_interval = refresh_interval
+        self.index = None
+        self.fetched_at = 0.0  # Unix time the index's coin list was fetched
+        self.task = None
+
+    def start(self):
+        """Load the stored index and keep refreshing it in the background"""
+        self.task = asyncio.create_task(self.refresh_loop(), name='coin-index')
+
+    def stop(self):
+        if self.task:
+            self.task.cancel()
+
+    def resolve(self, query):
+        return self.index.resolve(query) if self.index is not None else None
+
+    def search(self, prefix, limit=25):
+        return self.index.search(prefix, limit) if self.index is not None else []
+
+    async def refresh_loop(self):
+        """Refresh whenever the stored list is older than refresh_interval, retrying failures"""
+        while True:
+            try:
+                await self.load_stored()
+                delay = self.fetched_at + self.refresh_interval - time.time()
+                if delay <= 0:
+                    await self.refresh()
+                    continue
+            except (aiohttp.ClientError, asyncio.TimeoutError, CoinGeckoError) as e:
+                logger.warning('Coin list refresh failed, retrying in %ss: %s', RETRY_INTERVAL, e)
+                await asyncio.sleep(RETRY_INTERVAL)
+                continue
+            except Exception:
+                logger.exception('Coin list refresh failed, retrying in %ss', RETRY_INTERVAL)
+                await asyncio.sleep(RETRY_INTERVAL)
+                continue
+            await asyncio.sleep(delay + random.uniform(0, REFRESH_JITTER))
+
+    async def load_stored(self):
+        """Use the list saved by the last refresh (possibly another worker's) if it is newer than ours"""
+        fetched_at = await self.storage.get(STORAGE_NAMESPACE, 'fetched_at')
+        if fetched_at is None or fetched_at <= self.fetched_at:
+            return
+        encoded = await self.storage.get_raw(STORAGE_NAMESPACE, 'coins')
+        if encoded is None:
+            return
+        self.index = await asyncio.get_running_loop().run_in_executor(None, decode_index, encoded)
+        self.fetched_at = fetched_at
+        logger.info('Loaded %s stored coins fetched %.0f minutes ago', len(self.index), (time.time() - fetched_at) / 60)
+
+    async def refresh(self):
+        """Fetch the coin list and the top market-cap ranks, then swap in a new index and store it"""
+        timeout = aiohttp.ClientTimeout(total=60)
+        async with client_session(timeout=timeout) as session:
+            coins = await fetch_json(session, '/coins/list')
+            ranks = {}
+            for page in range(1, RANKED_PAGES + 1):
+                markets = await fetch_json(session, '/coins/markets', {
+                    'vs_currency': 'usd', 'order': 'market_cap_desc', 'per_page': 250, 'page': page
+                })
+                ranks.update((market['id'], market['market_cap_rank']) for market in markets if market.get('market_cap_rank'))
+
+        rows = [(coin['id'], coin['symbol'], coin['name'], ranks.get(coin['id'])) for coin in coins]
+        fetched_at = time.time()
+        self.index, encoded = await asyncio.get_running_loop().run_in_executor(None, encode_index, rows)
+        self.fetched_at = fetched_at
+        # The list first: a worker that sees the new fetched_at must find the new list
+        await self.storage.set_raw(STORAGE_NAMESPACE, 'coins', encoded)
+        await self.storage.set(STORAGE_NAMESPACE, 'fetched_at', fetched_at)
+        logger.info('Refreshed coin index: %s coins, %s ranked', len(rows), len(ranks))
+
+
+def encode_index(rows):
+    """Build an index over rows and encode them for storage (run in an executor)"""
+    return CoinIndex(rows), json.dumps(rows)
+
+
+def decode_index(encoded):
+    """Decode stored rows and build their index (run in an executor)"""
+    return CoinIndex(json.loads(encoded))
+
+
+class PriceService:
+    """Batched, cached CoinGecko prices; get() returns a coin's /simple/price entry or None"""
+
+    def __init__(self, window=PRICE_BATCH_WINDOW, ttl=PRICE_TTL, batch_size=PRICE_BATCH_SIZE):
+        self.window = window
+        self.ttl = ttl
+        self.batch_size = batch_size
+        self.cache = {}  # Coin id -> (time.monotonic() fetched, price entry or None if CoinGecko has none)
+        self.pending = {}  # Coin id -> future shared by everyone waiting for its price
+        self.queued = []  # Ids waiting for the batch window to close
+        self.flush_handle = None
+        self.tasks = set()  # Running batch requests
+
+    async def get(self, coin_id):
+        """A coin's price entry; raises CoinGeckoError or aiohttp errors if its batch request failed"""
+        entry = self.cache.get(coin_id)
+        if entry is not None and time.monotonic() - entry[0] < self.ttl:
+            cache_requests.inc('price', 'hit')
+            return entry[1]
+
+        future = self.pending.get(coin_id)
+        if future is not None:
+            cache_requests.inc('price', 'shared')
+        else:
+            cache_requests.inc('price', 'miss')
+            loop = asyncio.get_running_loop()
+            future = self.pending[coin_id] = loop.create_future()
+            future.add_done_callback(consume_exception)
+            self.queued.append(coin_id)
+            if len(self.queued) >= self.batch_size:
+                self.flush()
+            elif self.flush_handle is None:
+                self.flush_handle = loop.call_later(self.window, self.flush)
+
+        # A caller giving up (e.g. a cancelled command) doesn't cancel the fetch for the others
+        return await asyncio.shield(future)
+
+    def flush(self):
+        """Close the batch window and request every queued id"""
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        batch, self.queued = self.queued, []
+        if batch:
+            task = asyncio.create_task(self.fetch(batch), name=f'price batch ({len(batch)} ids)')
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    async def fetch(self, ids):
+        """One /simple/price call for a batch; resolves every waiting future"""
+        price_batch_size.observe(len(ids))
+        try:
+            async with client_session(timeout=aiohttp.ClientTimeout(total=10)) as session:
+                prices = await fetch_json(session, '/simple/price', {'ids': ','.join(ids), **PRICE_FIELDS})
+        except asyncio.CancelledError:
+            self.fail(ids, CoinGeckoError('Price service closed'))
+            raise
+        except Exception as e:
+            self.fail(ids, e)
+            return
+
+        now = time.monotonic()
+        self.prune(now)
+        for coin_id in ids:
+            price = prices.get(coin_id)
+            self.cache[coin_id] = (now, price)
+            future = self.pending.pop(coin_id, None)
+            if future is not None and not future.done():
+                future.set_result(price)
+
+    def fail(self, ids, error):
+        """Hand an error to everyone waiting for these ids"""
+        for coin_id in ids:
+            future = self.pending.pop(coin_id, None)
+            if future is not None and not future.done():
+                future.set_exception(error)
+
+    def prune(self, now):
+        """Drop expired prices so the cache only holds coins asked about recently"""
+        expired = [coin_id for coin_id, (fetched, _) in self.cache.items() if now - fetched >= self.ttl]
+        for coin_id in expired:
+            del self.cache[coin_id]
+
+    def close(self):
+        """Cancel the batch window and running requests; everyone still waiting gets CoinGeckoError
+
+        Every pending id is failed here rather than by its batch task, which
+        never reaches its own error handling if it is cancelled before it starts.
+        """
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        self.queued = []
+        self.fail(list(self.pending), CoinGeckoError('Price service closed'))
+        for task in self.tasks:
+            task.cancel()
+
+
+def consume_exception(future):
+    """Mark a shared future's exception as retrieved, in case every waiter was cancelled"""
+    if not future.cancelled():
+        future.exception()
+
+
+async def fetch_json(session, path, params=None):
+    """GET a CoinGecko API path and decode the JSON body"""
+    async with session.get(f'{COINGECKO_API}{path}', params=params) as response:
+        if response.status != 200:
+            raise CoinGeckoError(f'{path} returned HTTP {response.status}')
+        return await response.json()
@@ -0,0 +1,201 @@
+import asyncio
+import logging
+
+import discord
+
+# Discord fails an interaction that isn't acknowledged within 3 seconds. The
+# command tree installs an AutoDeferResponse on every slash command; if the
+# handler hasn't responded when the budget runs out, it defers on the
+# handler's behalf and later send_message calls go to the followup webhook.
+#
+# An ephemeral reply can't replace a public "thinking" message, so after a
+# public auto-defer the thinking message is deleted first and the reply is
+# sent as a separate ephemeral followup. interaction.followup.send goes
+# through the same step, and once the thinking message is gone
+# edit_original_response edits that ephemeral reply (or sends one) instead of
+# failing on the deleted message (see AutoDeferInteraction). A handler that
+# never replies has its thinking message removed when it finishes (see finish()).
+
+logger = logging.getLogger('bot.defer')
+
+
+class AutoDeferResponse(discord.InteractionResponse):
+    """Interaction response that defers itself if the handler is too slow to respond"""
+
+    __slots__ = ('ephemeral', 'timer', 'responding', 'auto_deferred', 'replied', 'thinking_deleted', 'private_reply')
+
+    def __init__(self, parent, ephemeral=False):
+        super().__init__(parent)
+        self.ephemeral = ephemeral  # Defer ephemerally, for commands whose replies are private
+        self.timer = None
+        self.responding = False  # Set once the handler starts its own initial response
+        self.auto_deferred = None  # Task running (or that ran) the automatic defer
+        self.replied = False  # Set once a followup replaced the thinking message
+        self.thinking_deleted = False  # Set once a public thinking message was deleted for an ephemeral reply
+        self.private_reply = None  # First followup after the thinking message was deleted; stands in for it
+
+    @classmethod
+    def install(cls, interaction, budget, ephemeral=False):
+        """Replace interaction.response and start the budget timer; returns the response"""
+        response = cls(interaction, ephemeral=ephemeral)
+        interaction._cs_response = response  # The slot behind the cached Interaction.response property
+        interaction.__class__ = AutoDeferInteraction  # Adds methods only, so the instance layout is unchanged
+        response.timer = asyncio.get_running_loop().call_later(budget, response.start_auto_defer)
+        return response
+
+    def cancel(self):
+        """Stop the budget timer (the handler responded or finished)"""
+        if self.timer:
+            self.timer.cancel()
+            self.timer = None
+
+    def start_auto_defer(self):
+        """Budget timer callback"""
+        self.timer = None
+        if self.is_done() or self.responding:
+            return
+        self.auto_deferred = asyncio.ensure_future(self.auto_defer())
+
+    async def auto_defer(self):
+        """Acknowledge the interaction with a "thinking" state"""
+        command = self._parent.command
+        logger.info('Auto-deferring /%s: no response within the budget', command.qualified_name if command else '?')
+        try:
+            await super().defer(ephemeral=self.ephemeral, thinking=True)
+        except discord.HTTPException as e:
+            logger.warning('Auto-defer failed: %s', e)
+
+    async def delete_thinking(self):
+        """Remove the public thinking message so the next followup is a new (possibly ephemeral) message"""
+        self.thinking_deleted = True
+        try:
+            await self._parent.delete_original_response()
+        except discord.HTTPException as e:
+            logger.warning('Failed to delete the auto-defer message: %s', e)
+
+    async def privatize(self, ephemeral):
+        """Make way for an ephemeral reply when the auto-defer was public and nothing replaced it yet"""
+        await self.auto_deferred
+        if ephemeral and not self.ephemeral and not self.replied and not self.thinking_deleted:
+            await self.delete_thinking()
+
+    async def finish(self):
+        """Called once the command is over: stop the timer and remove a thinking message nobody replaced
+
+        The handler may have replied through interaction.followup directly, so
+        the original response is checked before it is deleted.
+        """
+        self.cancel()
+        if self.auto_deferred is None or self.replied or self.thinking_deleted:
+            return
+        await self.auto_deferred
+        try:
+            message = await self._parent.original_response()
+            if message.flags.loading:
+                await self._parent.delete_original_response()
+        except discord.HTTPException as e:
+            logger.warning('Failed to clean up the auto-defer message: %s', e)
+
+    async def respond(self, method, *args, **kwargs):
+        """Run one of the handler's initial-response methods, keeping the timer out of its way"""
+        self.cancel()
+        self.responding = True
+        return await method(*args, **kwargs)
+
+    async def send_message(self, content=None, **kwargs):
+        """Send the initial response, or a followup once the interaction has been auto-deferred"""
+        if self.auto_deferred is None:
+            return await self.respond(super().send_message, content, **kwargs)
+
+        # Already deferred on the handler's behalf: the first followup replaces the "thinking" message
+        delete_after = kwargs.pop('delete_after', None)
+        if content is not None:
+            kwargs['content'] = content
+        message = await self.send_followup(wait=True, **kwargs)
+        if delete_after is not None:
+            await message.delete(delay=delete_after)
+        return message
+
+    async def send_followup(self, *args, **kwargs):
+        """Send a followup, first deleting a public thinking message if the followup is ephemeral"""
+        webhook = followup_webhook(self._parent)
+        if self.auto_deferred is None:
+            return await webhook.send(*args, **kwargs)
+
+        await self.privatize(kwargs.get('ephemeral', False))
+        kwargs['wait'] = True  # The message is needed to stand in for a deleted thinking message
+        message = await webhook.send(*args, **kwargs)
+        self.replied = True
+        if self.thinking_deleted and self.private_reply is None:
+            self.private_reply = message
+        return message
+
+    async def defer(self, **kwargs):
+        """Defer, unless the interaction was already auto-deferred"""
+        if self.auto_deferred is not None:
+            # The handler wanted a defer and already has one; its followups must still be private if asked
+            await self.privatize(kwargs.get('ephemeral', False))
+            return None
+        return await self.respond(super().defer, **kwargs)
+
+    async def send_modal(self, modal, /):
+        return await self.respond(super().send_modal, modal)
+
+    async def edit_message(self, **kwargs):
+        return await self.respond(super().edit_message, **kwargs)
+
+
+class AutoDeferFollowup:
+    """interaction.followup for an auto-deferred command: send() goes through AutoDeferResponse.send_followup"""
+
+    def __init__(self, webhook, response):
+        self.webhook = webhook
+        self.response = response
+
+    def __getattr__(self, name):
+        return getattr(self.webhook, name)
+
+    async def send(self, *args, **kwargs):
+        return await self.response.send_followup(*args, **kwargs)
+
+
+class AutoDeferInteraction(discord.Interaction):
+    """Interaction whose followups and original-response calls know about a deleted thinking message"""
+
+    __slots__ = ()
+
+    @property
+    def followup(self):
+        return AutoDeferFollowup(followup_webhook(self), self.response)
+
+    async def original_response(self):
+        response = self.response
+        if response.thinking_deleted and response.private_reply is not None:
+            return response.private_reply
+        return await super().original_response()
+
+    async def edit_original_response(self, **kwargs):
+        """Edit the original response; after the thinking message was deleted, edit or send the ephemeral reply"""
+        response = self.response
+        if not response.thinking_deleted:
+            return await super().edit_original_response(**kwargs)
+        if response.private_reply is not None:
+            return await response.private_reply.edit(**kwargs)
+
+        # Nothing replaced the deleted message yet: the edit becomes the ephemeral reply
+        attachments = kwargs.pop('attachments', None)
+        if attachments:
+            kwargs['files'] = [attachment for attachment in attachments if isinstance(attachment, discord.File)]
+        kwargs = {key: value for key, value in kwargs.items() if value is not None}
+        return await response.send_followup(ephemeral=True, wait=True, **kwargs)
+
+    async def delete_original_response(self):
+        response = self.response
+        if response.thinking_deleted and response.private_reply is not None:
+            return await response.private_reply.delete()
+        return await super().delete_original_response()
+
+
+def followup_webhook(interaction):
+    """The interaction's own followup webhook, bypassing AutoDeferInteraction.followup"""
+    return discord.Interaction.followup.__get__(interaction, discord.Interaction)
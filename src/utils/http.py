@@ -0,0 +1,43 @@
+import aiohttp
+
+from utils.metrics import metrics
+from utils.tracing import start_span, describe_request
+
+# Sessions for calls to external APIs. Every request made through them (and,
+# via the bot's http_trace, every Discord API call) is timed per host and
+# status, and recorded as a span when it runs inside a trace.
+
+upstream_latency = metrics.histogram(
+    'oyasumi_upstream_request_duration_seconds',
+    'Duration of outgoing HTTP requests (external APIs and Discord)',
+    labels=('host', 'status')
+)
+
+
+async def on_request_start(session, context, params):
+    context.start = session.loop.time()
+    context.span = start_span(describe_request(params.method, params.url))
+
+
+async def on_request_end(session, context, params):
+    status = str(params.response.status)
+    upstream_latency.observe(session.loop.time() - context.start, params.url.host, status)
+    if context.span:
+        context.span.finish(status=status)
+
+
+async def on_request_exception(session, context, params):
+    upstream_latency.observe(session.loop.time() - context.start, params.url.host, 'error')
+    if context.span:
+        context.span.finish(status='error', error=type(params.exception).__name__)
+
+
+trace_config = aiohttp.TraceConfig()
+trace_config.on_request_start.append(on_request_start)
+trace_config.on_request_end.append(on_request_end)
+trace_config.on_request_exception.append(on_request_exception)
+
+
+def client_session(**kwargs):
+    """Create an aiohttp session whose requests are recorded in the metrics registry"""
+    return aiohttp.ClientSession(trace_configs=[trace_config], **kwargs)
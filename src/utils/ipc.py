@@ -0,0 +1,333 @@
+import hmac
+import json
+import asyncio
+import logging
+import itertools
+
+# Newline-delimited JSON over a localhost TCP socket. Every connection starts
+# with a hello carrying the shared secret and the worker id. A worker sends
+# 'broadcast'; the hub forwards it as 'call' to every worker, gathers their
+# 'reply' messages and answers the origin with a single 'result'. A message
+# the hub can't handle is answered with an 'error'.
+
+STREAM_LIMIT = 2 ** 20  # Largest accepted message, in bytes
+RECONNECT_DELAY = 1.0  # Seconds before a worker first tries to reconnect to the hub
+MAX_RECONNECT_DELAY = 30.0  # Reconnect attempts back off up to this
+
+logger = logging.getLogger('ipc')
+
+
+async def send_message(writer, message):
+    """Write one JSON message"""
+    writer.write(json.dumps(message).encode('utf-8') + b'\n')
+    await writer.drain()
+
+
+async def read_message(reader):
+    """Read one JSON message, or None once the connection is closed"""
+    line = await reader.readline()
+    if not line:
+        return None
+    return json.loads(line)
+
+
+def check_hello(message, secret):
+    """Whether a connection's first message is a hello carrying the shared secret"""
+    if not isinstance(message, dict) or message.get('op') != 'hello':
+        return False
+    # Constant-time comparison, so response timing doesn't reveal how much of a guess was right
+    return hmac.compare_digest(str(message.get('secret')).encode('utf-8'), secret.encode('utf-8'))
+
+
+class ClusterHub:
+    """Relays broadcasts between cluster workers; runs in the launcher process"""
+
+    def __init__(self, secret, timeout=10.0):
+        self.secret = secret
+        self.timeout = timeout
+        self.workers = {}  # Worker id -> StreamWriter
+        self.pending = {}  # Request key -> {'origin', 'id', 'expected', 'results'}
+        self.server = None
+
+    async def start(self, host='127.0.0.1', port=0):
+        """Start listening and return the port in use"""
+        self.server = await asyncio.start_server(self.handle_connection, host, port, limit=STREAM_LIMIT)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        """Stop listening and drop every worker connection"""
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+        for writer in self.workers.values():
+            writer.close()
+
+    async def handle_connection(self, reader, writer):
+        """Serve one worker connection"""
+        try:
+            hello = await read_message(reader)
+        except (ConnectionError, ValueError) as e:  # Invalid JSON or a line over STREAM_LIMIT
+            logger.warning('Rejected a hub connection: %s', e)
+            writer.close()
+            return
+        if not check_hello(hello, self.secret) or not isinstance(hello.get('worker'), int):
+            writer.close()
+            return
+
+        worker_id = hello['worker']
+        self.workers[worker_id] = writer
+        logger.info('Worker %s connected', worker_id)
+
+        try:
+            while True:
+                message = await read_message(reader)
+                if message is None:
+                    break
+
+                if not isinstance(message, dict):
+                    message = {'op': None}
+                try:
+                    if message.get('op') == 'broadcast':
+                        await self.start_broadcast(worker_id, message)
+                    elif message.get('op') == 'reply':
+                        await self.add_reply(message['key'], worker_id, message['result'])
+                    else:
+                        raise ValueError(f'unknown op {message.get("op")!r}')
+                except (KeyError, TypeError, ValueError) as e:
+                    logger.warning('Worker %s sent an invalid message: %r', worker_id, e)
+                    await send_message(writer, {'op': 'error', 'id': message.get('id'), 'error': f'Invalid message: {e!r}'})
+        except (ConnectionError, ValueError) as e:
+            logger.warning('Worker %s connection error: %s', worker_id, e)
+        finally:
+            writer.close()
+            if self.workers.get(worker_id) is writer:
+                del self.workers[worker_id]
+            logger.info('Worker %s disconnected', worker_id)
+
+            # Nobody should wait for a reply from a worker that is gone
+            for key, request in list(self.pending.items()):
+                request['expected'].discard(worker_id)
+                await self.complete_if_done(key)
+
+    async def start_broadcast(self, origin, message):
+        """Forward a broadcast to every connected worker"""
+        key = f'{origin}:{message["id"]}'
+        self.pending[key] = {
+            'origin': origin,
+            'id': message['id'],
+            'expected': set(self.workers),
+            'results': {}
+        }
+
+        call = {'op': 'call', 'key': key, 'command': message['command'], 'args': message.get('args', {})}
+        for writer in list(self.workers.values()):
+            try:
+                await send_message(writer, call)
+            except ConnectionError:
+                pass  # The disconnect handler stops waiting for that worker
+
+        asyncio.get_running_loop().call_later(self.timeout, lambda: asyncio.ensure_future(self.expire(key)))
+
+    async def add_reply(self, key, worker_id, result):
+        """Record one worker's reply to a broadcast"""
+        request = self.pending.get(key)
+        if request is None:
+            return  # Already answered or expired
+        request['results'][worker_id] = result
+        await self.complete_if_done(key)
+
+    async def complete_if_done(self, key):
+        """Answer the origin once every expected worker has replied"""
+        request = self.pending.get(key)
+        if request is not None and request['expected'] <= request['results'].keys():
+            await self.finish(key)
+
+    async def expire(self, key):
+        """Answer the origin with whatever arrived before the timeout"""
+        if key in self.pending:
+            await self.finish(key)
+
+    async def finish(self, key):
+        """Send the gathered results back to the worker that asked"""
+        request = self.pending.pop(key)
+        writer = self.workers.get(request['origin'])
+        if writer is None:
+            return
+
+        results = [
+            {'worker': worker_id, 'result': result}
+            for worker_id, result in sorted(request['results'].items())
+        ]
+        missing = sorted(request['expected'] - request['results'].keys())
+        try:
+            await send_message(writer, {'op': 'result', 'id': request['id'], 'results': results, 'missing': missing})
+        except ConnectionError:
+            pass
+
+
+class ClusterClient:
+    """A worker's connection to the cluster hub"""
+
+    def __init__(self, worker_id, port, secret, timeout=15.0):
+        self.worker_id = worker_id
+        self.port = port
+        self.secret = secret
+        self.timeout = timeout
+        self.handler = None
+        self.writer = None
+        self.reader_task = None
+        self.pending = {}  # Request id -> future resolved with the gathered results
+        self.request_ids = itertools.count()
+
+    async def connect(self, handler):
+        """Connect to the hub; handler(command, args) answers broadcasts from any worker"""
+        self.handler = handler
+        reader = await self.open()
+        self.reader_task = asyncio.ensure_future(self.run(reader))
+
+    async def open(self):
+        """Open a connection to the hub and say hello; returns its reader"""
+        reader, self.writer = await asyncio.open_connection('127.0.0.1', self.port, limit=STREAM_LIMIT)
+        await send_message(self.writer, {'op': 'hello', 'secret': self.secret, 'worker': self.worker_id})
+        return reader
+
+    async def run(self, reader):
+        """Read from the hub, reconnecting with backoff whenever the connection drops"""
+        while True:
+            await self.read_loop(reader)
+            self.writer.close()
+
+            # Results of broadcasts sent on the lost connection will never arrive
+            for future in self.pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError('Lost connection to the cluster hub'))
+
+            delay = RECONNECT_DELAY
+            while True:
+                await asyncio.sleep(delay)
+                try:
+                    reader = await self.open()
+                except OSError as e:
+                    delay = min(delay * 2, MAX_RECONNECT_DELAY)
+                    logger.warning('Reconnecting to the cluster hub failed, retrying in %.1fs: %s', delay, e)
+                    continue
+                logger.info('Reconnected to the cluster hub')
+                break
+
+    async def close(self):
+        """Disconnect from the hub"""
+        if self.reader_task:
+            self.reader_task.cancel()
+        if self.writer:
+            self.writer.close()
+
+    async def broadcast(self, command, **args):
+        """Run a command on every worker (this one included) and return their results
+
+        Returns a list of {'worker', 'result'} dicts; workers that did not answer
+        in time are left out.
+        """
+        if self.writer is None or self.writer.is_closing():
+            raise ConnectionError('Not connected to the cluster hub')
+        request_id = next(self.request_ids)
+        future = asyncio.get_running_loop().create_future()
+        self.pending[request_id] = future
+
+        try:
+            await send_message(self.writer, {'op': 'broadcast', 'id': request_id, 'command': command, 'args': args})
+            message = await asyncio.wait_for(future, timeout=self.timeout)
+        finally:
+            self.pending.pop(request_id, None)
+
+        if message['missing']:
+            logger.warning('Broadcast %r: no reply from workers %s', command, message['missing'])
+        return message['results']
+
+    async def read_loop(self, reader):
+        """Dispatch calls and results arriving from the hub"""
+        try:
+            while True:
+                message = await read_message(reader)
+                if message is None:
+                    logger.warning('Lost connection to the cluster hub')
+                    return
+
+                if message['op'] == 'call':
+                    asyncio.ensure_future(self.answer(message))
+                elif message['op'] == 'result':
+                    future = self.pending.get(message['id'])
+                    if future and not future.done():
+                        future.set_result(message)
+                elif message['op'] == 'error':
+                    logger.warning('Cluster hub rejected a message: %s', message['error'])
+                    future = self.pending.get(message.get('id'))
+                    if future and not future.done():
+                        future.set_exception(RuntimeError(message['error']))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error('Cluster IPC reader failed: %s', e, exc_info=True)
+
+    async def answer(self, message):
+        """Run a broadcast call locally and reply to the hub"""
+        try:
+            result = await self.handler(message['command'], message['args'])
+        except Exception as e:
+            logger.error('IPC command %r failed: %s', message['command'], e, exc_info=True)
+            result = {'error': str(e)}
+
+        try:
+            await send_message(self.writer, {'op': 'reply', 'key': message['key'], 'result': result})
+        except ConnectionError:
+            pass
+
+
+class ControlServer:
+    """Local control channel for tools such as dev.py
+
+    Speaks the same JSON lines: a hello with the secret, then any number of
+    {'op': 'call', 'id', 'command', 'args'} requests, each answered with
+    {'op': 'result', 'id', 'result'} by the same handler that answers cluster
+    broadcasts.
+    """
+
+    def __init__(self, secret, handler):
+        self.secret = secret
+        self.handler = handler  # coroutine(command, args) -> result
+        self.server = None
+
+    async def start(self, host='127.0.0.1', port=0):
+        """Start listening and return the port in use"""
+        self.server = await asyncio.start_server(self.handle_connection, host, port, limit=STREAM_LIMIT)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        """Stop listening"""
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+
+    async def handle_connection(self, reader, writer):
+        """Serve one control connection"""
+        try:
+            hello = await read_message(reader)
+            if not check_hello(hello, self.secret):
+                return
+
+            while True:
+                message = await read_message(reader)
+                if message is None:
+                    return
+                if not isinstance(message, dict) or message.get('op') != 'call':
+                    continue
+
+                try:
+                    result = await self.handler(message['command'], message.get('args', {}))
+                except Exception as e:
+                    logger.error('Control command %r failed: %s', message.get('command'), e, exc_info=True)
+                    result = {'error': str(e)}
+                await send_message(writer, {'op': 'result', 'id': message.get('id'), 'result': result})
+        except (ConnectionError, ValueError) as e:
+            logger.warning('Control connection error: %s', e)
+        finally:
+            writer.close()
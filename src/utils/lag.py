@@ -0,0 +1,103 @@
+import sys
+import time
+import asyncio
+import logging
+import threading
+import traceback
+from collections import deque
+
+from utils.metrics import metrics
+
+# Event-loop lag monitoring. A sampler task measures how late the loop wakes it
+# up; a watchdog thread notices when the loop stops turning altogether and
+# captures the loop thread's stack while the blocking code is still running.
+
+loop_lag = metrics.histogram(
+    'oyasumi_event_loop_lag_seconds',
+    'How late the event loop ran the lag sampler',
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+)
+loop_stalls = metrics.counter(
+    'oyasumi_event_loop_stalls_total',
+    'Times a single callback blocked the event loop past the threshold'
+)
+
+
+class LoopLagMonitor:
+    """Samples event-loop lag and logs the stack of whatever blocks the loop too long
+
+    Slash command tasks are named after their command (see OyasumiTree) and
+    discord.py names event tasks after their event, so the task name in a stall
+    report says what was running.
+    """
+
+    def __init__(self, interval=0.5, threshold=0.25, history=1000):
+        self.interval = interval  # Seconds between samples
+        self.threshold = threshold  # Seconds a callback may block before its stack is logged
+        self.samples = deque(maxlen=history)  # Recent lag samples in seconds
+        self.logger = logging.getLogger('bot.lag')
+        self.loop = None
+        self.loop_thread_id = None
+        self.heartbeat = 0.0  # time.monotonic() of the loop's last sampler wakeup
+        self.task = None
+        self.watchdog = None
+        self.stopped = threading.Event()
+
+    def start(self):
+        """Start sampling on the running loop and the watchdog thread beside it"""
+        self.loop = asyncio.get_running_loop()
+        self.loop_thread_id = threading.get_ident()
+        self.heartbeat = time.monotonic()
+        self.stopped.clear()
+        self.task = asyncio.create_task(self.sample_loop(), name='lag-monitor')
+        self.watchdog = threading.Thread(target=self.watch, name='lag-watchdog', daemon=True)
+        self.watchdog.start()
+
+    def stop(self):
+        """Stop sampling; the watchdog exits within one check"""
+        self.stopped.set()
+        if self.task:
+            self.task.cancel()
+
+    async def sample_loop(self):
+        """Sleep for the interval and record how much later than that the loop woke up"""
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self.heartbeat = now
+
+            lag = max(now - started - self.interval, 0.0)
+            self.samples.append(lag)
+            loop_lag.observe(lag)
+
+    def watch(self):
+        """Watchdog thread: report a stall once per blocked heartbeat"""
+        reported = None
+        check_every = min(self.threshold / 2, self.interval)
+
+        while not self.stopped.wait(check_every):
+            heartbeat = self.heartbeat
+            blocked_for = time.monotonic() - heartbeat - self.interval
+            if blocked_for < self.threshold or reported == heartbeat:
+                continue
+            reported = heartbeat
+            loop_stalls.inc()
+
+            frame = sys._current_frames().get(self.loop_thread_id)
+            stack = ''.join(traceback.format_stack(frame)) if frame else '  (stack unavailable)\n'
+            task = asyncio.current_task(self.loop)
+            running = task.get_name() if task else 'a plain callback (no task)'
+            self.logger.warning(
+                'Event loop blocked for over %.0fms while running %s\n%s',
+                blocked_for * 1000, running, stack.rstrip()
+            )
+
+    def percentiles(self, points=(50, 95, 99)):
+        """Lag percentiles in milliseconds over the recent samples, or None before the first sample"""
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        result = {f'p{point}': ordered[min(len(ordered) - 1, len(ordered) * point // 100)] * 1000 for point in points}
+        result['max'] = ordered[-1] * 1000
+        return result
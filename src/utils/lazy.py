@@ -0,0 +1,59 @@
+import asyncio
+
+from discord.ext import commands
+
+
+class LazyCog(commands.Cog):
+    """Lightweight stub cog that imports its real implementation on first use
+
+    Subclasses declare the same app commands as the implementation cog (same
+    names, descriptions and parameters, so the synced payload is identical)
+    and forward each call with ``await self.forward('command', interaction, ...)``.
+    The stub must share the implementation cog's name so it can be swapped out.
+    """
+
+    implementation = None  # Extension name of the real cog, e.g. 'cogs.impl.weather'
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.load_lock = asyncio.Lock()
+
+    async def forward(self, command_name, interaction, *args, **kwargs):
+        """Load the implementation if needed and run its version of a command"""
+        cog = await self.load_implementation()
+        command = next(command for command in cog.get_app_commands() if command.name == command_name)
+        await command.callback(cog, interaction, *args, **kwargs)
+
+    async def load_implementation(self):
+        """Swap this stub for the implementation cog, importing it once"""
+        async with self.load_lock:
+            if self.implementation in self.bot.extensions:
+                return self.bot.get_cog(self.qualified_name)
+
+            try:
+                await self.bot.remove_cog(self.qualified_name)
+                # Timed like a startup extension, so the report shows what deferring it saved
+                timing = await self.bot.load_extension_profiled(self.implementation)
+            except Exception:
+                # Put the stub back so later invocations can retry
+                await self.bot.add_cog(self, override=True)
+                raise
+
+            self.bot.lazy_extension_stats[self.implementation] = timing
+            self.bot.logger.info(
+                'Lazily loaded %s in %.1fms (import %.1fms), time saved at startup',
+                self.implementation, timing['total_ms'], timing['import_ms']
+            )
+            return self.bot.get_cog(self.qualified_name)
+
+
+async def setup_lazy(bot, stub_cls):
+    """Extension setup for a stub module
+
+    Adds the stub, or reloads the implementation if it has already been loaded
+    (so reloading the stub extension reloads the real cog).
+    """
+    if stub_cls.implementation in bot.extensions:
+        await bot.reload_extension(stub_cls.implementation)
+    else:
+        await bot.add_cog(stub_cls(bot))
@@ -0,0 +1,144 @@
+import copy
+import json
+import time
+import queue
+import atexit
+import logging
+import logging.handlers
+from datetime import datetime, timezone
+
+# Log calls only enqueue the record; a background thread formats and writes it,
+# so a slow disk can't stall the event loop (and with it gateway heartbeats).
+# Use lazy %-style arguments (logger.info('Loaded %s', name)) so messages below
+# the configured level are never formatted at all.
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+exception_formatter = logging.Formatter()  # Formats tracebacks before records are queued
+
+active_listener = None  # QueueListener started by setup_logging, until stop_logging
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line"""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exc_info'] = record.exc_text  # Formatted before queueing (see DeferredQueueHandler)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class SizeAndTimeRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """Rolls over once the file reaches max_bytes or every interval seconds, whichever comes first
+
+    The next time-based rollover is kept in a small file beside the log
+    (bot.log.rollover), so restarting the bot doesn't restart the interval.
+    """
+
+    def __init__(self, filename, max_bytes, backup_count, interval, encoding='utf-8'):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding=encoding)
+        self.interval = interval
+        self.rollover_file = f'{self.baseFilename}.rollover'
+        self.rollover_at = None
+        if interval:
+            self.rollover_at = self.read_rollover_at()
+            if self.rollover_at is None:
+                self.schedule_rollover()
+
+    def read_rollover_at(self):
+        """The stored next rollover time, or None if there is none yet"""
+        try:
+            with open(self.rollover_file, 'r', encoding='utf-8') as rollover_file:
+                return float(rollover_file.read())
+        except (OSError, ValueError):
+            return None
+
+    def schedule_rollover(self):
+        """Start a new interval from now and remember when it ends"""
+        self.rollover_at = time.time() + self.interval
+        try:
+            with open(self.rollover_file, 'w', encoding='utf-8') as rollover_file:
+                rollover_file.write(repr(self.rollover_at))
+        except OSError:
+            pass  # Rotation still works; it just restarts with the process
+
+    def shouldRollover(self, record):
+        if self.rollover_at is not None and time.time() >= self.rollover_at:
+            return True
+        return super().shouldRollover(record)
+
+    def doRollover(self):
+        super().doRollover()
+        if self.interval:
+            self.schedule_rollover()
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Queue records with their message resolved; the listener thread does the rest of the formatting
+
+    msg % args runs here, on the calling thread, so a mutable argument is
+    logged as it was at the call; the traceback is formatted now for the same
+    reason. Timestamps, layout and JSON encoding are left to the listener.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = record.exc_text or exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def setup_logging(level='INFO', log_file='bot.log', max_bytes=10 * 2 ** 20, backup_count=5,
+                  rotate_hours=24, json_output=False):
+    """Route all logging through a queue to a background writer thread
+
+    Returns the started QueueListener; it is stopped (and the queue flushed) at
+    exit, or earlier by stop_logging.
+    """
+    global active_listener
+    formatter = JsonFormatter() if json_output else logging.Formatter(TEXT_FORMAT)
+
+    file_handler = SizeAndTimeRotatingFileHandler(log_file, max_bytes, backup_count, rotate_hours * 3600)
+    console_handler = logging.StreamHandler()
+    for handler in (file_handler, console_handler):
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+    listener.start()
+    active_listener = listener
+    atexit.register(stop_logging)
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(DeferredQueueHandler(log_queue))
+
+    return listener
+
+
+def stop_logging():
+    """Write out every queued record and close the log files; later calls do nothing
+
+    atexit covers a normal exit, but os.execv (run.py's restart) replaces the
+    process without running atexit handlers, so call this before it.
+    """
+    global active_listener
+    listener, active_listener = active_listener, None
+    if listener is None:
+        return
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
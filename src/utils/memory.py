@@ -0,0 +1,125 @@
+import gc
+import os
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime, timezone
+
+import discord
+
+
+def get_rss_bytes():
+    """Current resident set size of this process, or None if it can't be read"""
+    try:
+        # Linux: second field of statm is resident pages
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+
+    try:
+        import resource
+    except ImportError:
+        return None  # Windows
+
+    # Peak rather than current RSS; kilobytes on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def format_bytes(size):
+    """Human-readable byte count"""
+    if size is None:
+        return 'N/A'
+    sign = '-' if size < 0 else ''
+    size = abs(size)
+    for unit in ('B', 'KiB', 'MiB'):
+        if size < 1024:
+            return f'{sign}{size:.1f} {unit}'
+        size /= 1024
+    return f'{sign}{size:.1f} GiB'
+
+
+def count_live_views():
+    """Live discord.ui.View instances by class (walks every gc-tracked object)"""
+    return Counter(type(obj).__qualname__ for obj in gc.get_objects() if isinstance(obj, discord.ui.View))
+
+
+class MemoryDiagnostics:
+    """tracemalloc snapshots on demand, each diffed against the first and the previous one
+
+    Tracing slows allocations down, so it only runs between start() and stop().
+    """
+
+    FRAMES = 10  # Stack depth kept per allocation
+    TOP_SITES = 25  # Allocation sites listed per diff
+
+    # Allocations made by tracemalloc itself and the import machinery are noise
+    FILTERS = (
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+        tracemalloc.Filter(False, '<unknown>'),
+    )
+
+    def __init__(self):
+        self.baseline = None
+        self.previous = None
+        self.started_at = None
+        self.previous_at = None
+
+    @property
+    def running(self):
+        return self.baseline is not None
+
+    def take_snapshot(self):
+        return tracemalloc.take_snapshot().filter_traces(self.FILTERS)
+
+    def start(self):
+        """Start tracing and take the baseline snapshot"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.FRAMES)
+        self.baseline = self.previous = self.take_snapshot()
+        self.started_at = self.previous_at = time.time()
+
+    def stop(self):
+        """Stop tracing and drop the snapshots"""
+        tracemalloc.stop()
+        self.baseline = self.previous = None
+        self.started_at = self.previous_at = None
+
+    def report(self):
+        """Take a snapshot and describe growth since start and since the last report, as text"""
+        if not tracemalloc.is_tracing():
+            raise RuntimeError('tracemalloc was stopped outside of these diagnostics')
+        snapshot = self.take_snapshot()
+        now = time.time()
+        current, peak = tracemalloc.get_traced_memory()
+
+        lines = [
+            f'Memory report at {datetime.now(timezone.utc):%Y-%m-%d %H:%M:%S} UTC',
+            f'RSS: {format_bytes(get_rss_bytes())}',
+            f'Traced: {format_bytes(current)} (peak {format_bytes(peak)}), tracing for {now - self.started_at:.0f}s',
+            '',
+            'Live views:'
+        ]
+        views = count_live_views()
+        lines.extend(f'  {name}: {count}' for name, count in views.most_common())
+        if not views:
+            lines.append('  none')
+
+        for title, earlier, since in (
+            ('since tracing started', self.baseline, self.started_at),
+            ('since the previous report', self.previous, self.previous_at)
+        ):
+            lines.extend(['', f'Top allocation growth {title} ({now - since:.0f}s):'])
+            for stat in snapshot.compare_to(earlier, 'lineno')[:self.TOP_SITES]:
+                frame = stat.traceback[0]
+                lines.append(
+                    f'  {format_bytes(stat.size_diff):>12} {stat.count_diff:+8} blocks  '
+                    f'{frame.filename}:{frame.lineno} (now {format_bytes(stat.size)})'
+                )
+
+        self.previous, self.previous_at = snapshot, now
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,157 @@
+import math
+from bisect import bisect_left
+
+from aiohttp import web
+
+# In-process metrics exposed in the Prometheus text format. Recording is a dict
+# lookup plus (for histograms) a bisect over the bucket bounds, so it is cheap
+# enough to run around every command and HTTP request.
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def format_labels(names, values, extra=None):
+    """Render a label set as {name="value",...}"""
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    escaped = (
+        f'{name}="' + str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+        for name, value in pairs
+    )
+    return '{' + ','.join(escaped) + '}'
+
+
+def format_value(value):
+    """Render a sample value the way Prometheus expects"""
+    if math.isnan(value):
+        return 'NaN'
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonically increasing count per label set"""
+
+    type = 'counter'
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.values = {}
+
+    def inc(self, *label_values, amount=1):
+        self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def samples(self):
+        for label_values, value in self.values.items():
+            yield self.name + format_labels(self.labels, label_values), value
+
+
+class Gauge:
+    """Point-in-time value per label set, optionally read from a callback at scrape time"""
+
+    type = 'gauge'
+
+    def __init__(self, name, documentation, labels=(), callback=None):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.values = {}
+        self.callback = callback  # () -> {label_values tuple: value}
+
+    def set(self, value, *label_values):
+        self.values[label_values] = value
+
+    def samples(self):
+        values = self.callback() if self.callback else self.values
+        for label_values, value in values.items():
+            yield self.name + format_labels(self.labels, label_values), value
+
+
+class Histogram:
+    """Bucketed distribution of observed values per label set"""
+
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self.values = {}  # label_values -> [per-bucket counts (+Inf last), sum, count]
+
+    def observe(self, value, *label_values):
+        entry = self.values.get(label_values)
+        if entry is None:
+            entry = self.values[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        entry[0][bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+        entry[2] += 1
+
+    def samples(self):
+        for label_values, (counts, total, count) in self.values.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                yield self.name + '_bucket' + format_labels(self.labels, label_values, ('le', format_value(bound))), cumulative
+            yield self.name + '_sum' + format_labels(self.labels, label_values), total
+            yield self.name + '_count' + format_labels(self.labels, label_values), count
+
+
+class MetricsRegistry:
+    """Holds every metric; getters return the existing metric so reloaded cogs keep their data"""
+
+    def __init__(self):
+        self.metrics = {}
+
+    def get_or_create(self, cls, name, documentation, **kwargs):
+        metric = self.metrics.get(name)
+        if metric is None:
+            metric = self.metrics[name] = cls(name, documentation, **kwargs)
+        return metric
+
+    def counter(self, name, documentation, labels=()):
+        return self.get_or_create(Counter, name, documentation, labels=labels)
+
+    def gauge(self, name, documentation, labels=(), callback=None):
+        gauge = self.get_or_create(Gauge, name, documentation, labels=labels)
+        if callback is not None:
+            gauge.callback = callback
+        return gauge
+
+    def histogram(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        return self.get_or_create(Histogram, name, documentation, labels=labels, buckets=buckets)
+
+    def render(self):
+        """Render every metric in the Prometheus text exposition format"""
+        lines = []
+        for metric in self.metrics.values():
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.type}')
+            for sample, value in metric.samples():
+                lines.append(f'{sample} {format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+metrics = MetricsRegistry()
+
+
+async def start_metrics_server(registry, host, port):
+    """Serve GET /metrics on host:port; returns the runner to clean up on shutdown"""
+
+    async def handle_metrics(request):
+        return web.Response(text=registry.render(), content_type='text/plain', charset='utf-8',
+                            headers={'X-Content-Type-Options': 'nosniff'})
+
+    app = web.Application()
+    app.router.add_get('/metrics', handle_metrics)
+
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
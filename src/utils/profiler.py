@@ -0,0 +1,128 @@
+import json
+import time
+import platform
+from contextlib import contextmanager
+from datetime import datetime, timezone, timedelta
+
+# time.perf_counter() at the very top of the launcher (run.py or cluster.py),
+# so the startup report covers interpreter start-up and the launcher itself.
+# None when bot.py is run directly; the profiler then starts at its import.
+process_started = None
+
+
+def mark_process_start(started):
+    """Called by the launcher before bot.py is imported"""
+    global process_started
+    process_started = started
+
+
+class StartupProfiler:
+    """Records when each startup phase begins and ends, relative to process start"""
+
+    def __init__(self, started=None):
+        if started is None:
+            started = process_started if process_started is not None else time.perf_counter()
+        self.started = started
+        self.started_at = datetime.now(timezone.utc) - timedelta(seconds=time.perf_counter() - started)
+        self.phases = {}  # Phase name -> {'start_ms', 'end_ms', 'duration_ms'}
+        self.extensions = {}  # Extension name -> {'import_ms', 'setup_ms', 'total_ms'}
+        self.total_ms = None  # Frozen by finish()
+        self.finished = False
+
+    def elapsed_ms(self):
+        """Milliseconds since process start"""
+        return (time.perf_counter() - self.started) * 1000
+
+    def start(self, phase):
+        """Mark the beginning of a phase"""
+        self.phases[phase] = {'start_ms': round(self.elapsed_ms(), 2), 'end_ms': None, 'duration_ms': None}
+
+    def end(self, phase):
+        """Mark the end of a phase started with start()"""
+        entry = self.phases.get(phase)
+        if entry is None or entry['end_ms'] is not None:
+            return
+        entry['end_ms'] = round(self.elapsed_ms(), 2)
+        entry['duration_ms'] = round(entry['end_ms'] - entry['start_ms'], 2)
+
+    @contextmanager
+    def phase(self, phase):
+        """Time a block of startup code as one phase"""
+        self.start(phase)
+        try:
+            yield
+        finally:
+            self.end(phase)
+
+    def record_extension(self, name, import_ms, total_ms, wall_ms):
+        """Record how long an extension took to import and to run its setup
+
+        import_ms and total_ms count only the extension's own work (see
+        BusyTimer); wall_ms is the elapsed time, which overlaps with other
+        extensions loading concurrently.
+        """
+        self.extensions[name] = {
+            'import_ms': round(import_ms, 2),
+            'setup_ms': round(total_ms - import_ms, 2),
+            'total_ms': round(total_ms, 2),
+            'wall_ms': round(wall_ms, 2)
+        }
+
+    def report(self):
+        """Build the structured startup report"""
+        return {
+            'started_at': self.started_at.isoformat(),
+            'total_ms': self.total_ms if self.finished else round(self.elapsed_ms(), 2),
+            'python': platform.python_version(),
+            'phases': dict(sorted(self.phases.items(), key=lambda item: item[1]['start_ms'])),
+            'extensions': dict(sorted(self.extensions.items(), key=lambda item: -item[1]['total_ms']))
+        }
+
+    def finish(self, path):
+        """Freeze the total startup time and write the report to disk"""
+        self.total_ms = round(self.elapsed_ms(), 2)
+        self.finished = True
+        path.write_text(json.dumps(self.report(), indent=2), encoding='utf-8')
+
+
+class BusyTimer:
+    """Awaitable running a coroutine that adds up only the time the coroutine itself runs
+
+    Time spent suspended (while other tasks, such as other extensions
+    loading concurrently, use the loop) is not counted.
+    """
+
+    def __init__(self, coroutine):
+        self.coroutine = coroutine
+        self.busy = 0.0  # Seconds of completed steps
+        self.step_started = None  # perf_counter() at the start of the running step, if one is running
+
+    def elapsed_ms(self):
+        """Own running time so far, including the step running right now"""
+        busy = self.busy
+        if self.step_started is not None:
+            busy += time.perf_counter() - self.step_started
+        return busy * 1000
+
+    def __await__(self):
+        value, error = None, None
+        while True:
+            self.step_started = time.perf_counter()
+            try:
+                if error is not None:
+                    yielded = self.coroutine.throw(error)
+                else:
+                    yielded = self.coroutine.send(value)
+            except StopIteration as stop:
+                return stop.value
+            finally:
+                self.busy += time.perf_counter() - self.step_started
+                self.step_started = None
+
+            try:
+                value, error = (yield yielded), None
+            except GeneratorExit:
+                self.coroutine.close()
+                raise
+            except BaseException as e:
+                value, error = None, e
@@ -0,0 +1,88 @@
+import io
+import time
+import asyncio
+import cProfile
+import pstats
+
+# Owner-triggered cProfile sessions for single slash commands. Nothing is
+# profiled unless a session is running; with none, the only cost per command
+# is an empty-dict check.
+#
+# The profiler runs on the event loop thread from dispatch until the command
+# finishes, so anything else the loop runs meanwhile is included. Invocations
+# that overlap a profiled one are not profiled themselves.
+
+
+class ProfileSession:
+    """Stats gathered over the next few invocations of one command"""
+
+    def __init__(self, command, invocations):
+        self.command = command
+        self.remaining = invocations
+        self.collected = 0
+        self.profile = cProfile.Profile()
+        self.started_at = time.time()
+        self.done = asyncio.get_running_loop().create_future()
+
+    def report(self, limit=40):
+        """Top functions by cumulative time, as text"""
+        output = io.StringIO()
+        output.write(f'Profile of /{self.command} over {self.collected} invocation(s)\n\n')
+        if self.collected:
+            stats = pstats.Stats(self.profile, stream=output)
+            stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(limit)
+        return output.getvalue()
+
+
+class CommandProfiler:
+    """Runs at most one profiled invocation at a time (cProfile allows one active profiler per thread)"""
+
+    def __init__(self):
+        self.sessions = {}  # Command qualified name -> ProfileSession
+        self.active = None  # Session whose profiler is enabled right now
+
+    def start(self, command, invocations):
+        """Profile the next invocations of a command; await session.done for the report"""
+        if command in self.sessions:
+            raise ValueError(f'/{command} is already being profiled')
+        session = self.sessions[command] = ProfileSession(command, invocations)
+        return session
+
+    def stop(self, command):
+        """End a session early, resolving it with whatever was collected"""
+        session = self.sessions.pop(command, None)
+        if session is None:
+            return
+        if self.active is session:
+            session.profile.disable()
+            self.active = None
+        if not session.done.done():
+            session.done.set_result(session.report())
+
+    def enter(self, interaction):
+        """Start profiling this invocation if its command has a session"""
+        if not self.sessions or self.active is not None:
+            return
+        session = self.sessions.get(interaction.command.qualified_name)
+        if session is None:
+            return
+
+        self.active = session
+        interaction.extras['profile'] = session
+        # Completion and error events call exit(), but a dropped or cancelled
+        # invocation fires neither; the invoking task ends either way
+        asyncio.current_task().add_done_callback(lambda task: self.exit(interaction))
+        session.profile.enable()
+
+    def exit(self, interaction):
+        """Stop profiling this invocation and finish the session once enough were collected"""
+        session = interaction.extras.pop('profile', None)
+        if session is None or self.active is not session:
+            return
+
+        session.profile.disable()
+        self.active = None
+        session.collected += 1
+        session.remaining -= 1
+        if session.remaining <= 0:
+            self.stop(session.command)
@@ -0,0 +1,121 @@
+import time
+from itertools import islice
+from collections import OrderedDict
+
+from discord import app_commands
+
+from utils.metrics import metrics
+
+# Token-bucket rate limits for slash commands. Buckets live in one LRU-bounded
+# store shared by every command; each decision touches at most three buckets,
+# so it is O(1) however many users or guilds are tracked. In cluster mode each
+# worker keeps its own store, so limits apply per process.
+
+MAX_BUCKETS = 10_000  # Least recently used refilled buckets beyond this are forgotten (a forgotten bucket is full)
+EVICTION_SCAN = 8  # Least recently used buckets examined per decision when over MAX_BUCKETS
+HARD_LIMIT_FACTOR = 2  # Past max_buckets * this, the least recently used buckets go even if depleted
+
+rate_limited = metrics.counter(
+    'oyasumi_rate_limited_total',
+    'Slash commands rejected by a rate limit',
+    labels=('command', 'scope')
+)
+
+
+class RateLimiter:
+    """LRU-bounded store of token buckets: key -> (tokens, last refill time, time it is full again)
+
+    Only buckets that have refilled are evicted: forgetting a depleted one
+    would hand its owner a full bucket. Depleted buckets stay where they are
+    in the LRU order, so the store can grow past max_buckets while many are
+    depleted; at max_buckets * HARD_LIMIT_FACTOR the oldest go regardless, so
+    a flood of new keys can't grow it without bound.
+    """
+
+    def __init__(self, max_buckets=MAX_BUCKETS):
+        self.max_buckets = max_buckets
+        self.buckets = OrderedDict()
+
+    def refill(self, key, rate, per, now):
+        """Tokens available in a bucket right now (a bucket starts full)"""
+        state = self.buckets.get(key)
+        if state is None:
+            return float(rate)
+        tokens, updated, _ = state
+        return min(float(rate), tokens + (now - updated) * rate / per)
+
+    def hit(self, limits, now=None):
+        """Take one token from every (key, rate, per) bucket, or none of them
+
+        Returns (None, None) when allowed, otherwise (retry_after seconds,
+        index of the limit that is longest to wait for).
+        """
+        now = time.monotonic() if now is None else now
+        available = [self.refill(key, rate, per, now) for key, rate, per in limits]
+
+        retry_after, blocked = None, None
+        for index, ((key, rate, per), tokens) in enumerate(zip(limits, available)):
+            if tokens < 1:
+                wait = (1 - tokens) * per / rate
+                if retry_after is None or wait > retry_after:
+                    retry_after, blocked = wait, index
+        if retry_after is not None:
+            return retry_after, blocked
+
+        for (key, rate, per), tokens in zip(limits, available):
+            tokens -= 1
+            self.buckets[key] = (tokens, now, now + (rate - tokens) * per / rate)
+            self.buckets.move_to_end(key)
+        self.evict(now)
+        return None, None
+
+    def evict(self, now):
+        """Forget refilled buckets among the least recently used, then enforce the hard limit"""
+        excess = len(self.buckets) - self.max_buckets
+        if excess <= 0:
+            return
+        oldest = islice(self.buckets.items(), EVICTION_SCAN)
+        refilled = [key for key, (_, _, full_at) in oldest if full_at <= now]
+        for key in refilled[:excess]:
+            del self.buckets[key]
+        while len(self.buckets) > self.max_buckets * HARD_LIMIT_FACTOR:
+            self.buckets.popitem(last=False)
+
+
+limiter = RateLimiter()
+
+
+def rate_limit(per_user=None, per_guild=None, total=None):
+    """Limit a slash command with token buckets, each given as (uses, seconds)
+
+    per_user: for each user; per_guild: for each guild (each user in DMs);
+    total: for everyone together. A use is only counted when every bucket has
+    a token left. Rejections raise CommandOnCooldown, answered by the bot's
+    on_app_command_error.
+    """
+    scopes = [
+        (scope, limit) for scope, limit in (('user', per_user), ('guild', per_guild), ('global', total))
+        if limit is not None
+    ]
+
+    def predicate(interaction):
+        name = interaction.command.qualified_name
+        limits = []
+        for scope, (rate, per) in scopes:
+            if scope == 'user':
+                owner = interaction.user.id
+            elif scope == 'guild':
+                owner = interaction.guild_id or f'dm{interaction.user.id}'
+            else:
+                owner = None
+            limits.append(((name, scope, owner), rate, per))
+
+        retry_after, blocked = limiter.hit(limits)
+        if retry_after is None:
+            return True
+
+        scope, (rate, per) = scopes[blocked]
+        rate_limited.inc(name, scope)
+        raise app_commands.CommandOnCooldown(app_commands.Cooldown(rate, per), retry_after)
+
+    return app_commands.check(predicate)
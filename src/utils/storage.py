@@ -0,0 +1,295 @@
+import json
+import time
+import queue
+import asyncio
+import logging
+import sqlite3
+import threading
+
+from utils.metrics import metrics
+
+# SQLite in WAL mode behind one dedicated thread. Coroutines queue jobs and
+# await a future; the thread takes every job waiting when it wakes up and runs
+# them in a single transaction, so a burst of writes costs one commit (a group
+# commit). Each write runs inside its own savepoint, so a failing statement
+# only fails its own caller. Futures resolve after the commit, so a write that
+# returned is durable. Reads are queued too and see every write queued before
+# them.
+#
+# Cluster workers share the database file; WAL lets them read concurrently and
+# busy_timeout queues their writers.
+
+MAX_BATCH = 512  # Jobs per transaction
+BUSY_TIMEOUT_MS = 5000  # How long a write waits for another process holding the write lock
+
+logger = logging.getLogger('bot.storage')
+
+storage_batch_size = metrics.histogram(
+    'oyasumi_storage_batch_jobs',
+    'Jobs run per storage transaction',
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 512)
+)
+storage_commit_seconds = metrics.histogram(
+    'oyasumi_storage_transaction_seconds',
+    'Time the storage thread spent on one transaction, commit included',
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+)
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS kv (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+) WITHOUT ROWID
+'''
+
+
+class StorageError(Exception):
+    """Raised when the database fails a query, or when storage is used while closed"""
+
+
+def check_identifier(name):
+    """Table and column names are interpolated into SQL, so only plain identifiers are allowed"""
+    if not name.isidentifier():
+        raise ValueError(f'Invalid SQL identifier: {name!r}')
+    return name
+
+
+def wrap_error(error):
+    """Callers see StorageError rather than the backend's own exception types"""
+    if isinstance(error, sqlite3.Error):
+        wrapped = StorageError(str(error))
+        wrapped.__cause__ = error
+        return wrapped
+    return error
+
+
+class Storage:
+    """Async key/value and table storage over one SQLite connection on its own thread"""
+
+    def __init__(self, path, max_batch=MAX_BATCH):
+        self.path = str(path)
+        self.max_batch = max_batch
+        self.jobs = queue.SimpleQueue()  # (write, function, future), or None to stop
+        self.thread = None
+        self.loop = None
+        self.closed = False
+
+    async def open(self):
+        """Start the storage thread and wait for the database to be ready"""
+        self.loop = asyncio.get_running_loop()
+        ready = self.loop.create_future()
+        self.thread = threading.Thread(target=self.serve, args=(ready,), name='storage', daemon=True)
+        self.thread.start()
+        await ready
+
+    async def close(self):
+        """Finish every queued job, then close the database"""
+        if self.thread is None or self.closed:
+            return
+        self.closed = True
+        self.jobs.put(None)
+        await self.loop.run_in_executor(None, self.thread.join)
+
+    def connect(self):
+        connection = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        connection.row_factory = sqlite3.Row
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')  # WAL commits survive a crash; fsync happens at checkpoints
+        connection.execute(f'PRAGMA busy_timeout={BUSY_TIMEOUT_MS}')
+        connection.execute(SCHEMA)
+        return connection
+
+    def serve(self, ready):
+        """Storage thread: run queued jobs in batches until close()"""
+        try:
+            connection = self.connect()
+        except Exception as e:
+            self.loop.call_soon_threadsafe(self.resolve, ready, None, e)
+            return
+        self.loop.call_soon_threadsafe(self.resolve, ready, None, None)
+
+        running = True
+        while running:
+            batch = [self.jobs.get()]
+            while batch[-1] is not None and len(batch) < self.max_batch:
+                try:
+                    batch.append(self.jobs.get_nowait())
+                except queue.Empty:
+                    break
+            if batch[-1] is None:
+                batch.pop()
+                running = False
+            if batch:
+                self.run_batch(connection, batch)
+
+        connection.close()
+
+    def run_batch(self, connection, batch):
+        """Run a batch of jobs in one transaction and hand back their results once it commits"""
+        started = time.perf_counter()
+        results = []
+        writes = any(write for write, _, _ in batch)
+        try:
+            if writes:
+                connection.execute('BEGIN IMMEDIATE')
+            for write, function, future in batch:
+                if write:
+                    connection.execute('SAVEPOINT job')
+                try:
+                    result = function(connection)
+                except Exception as e:
+                    if write:
+                        connection.execute('ROLLBACK TO job')
+                        connection.execute('RELEASE job')
+                    results.append((future, None, wrap_error(e)))
+                else:
+                    if write:
+                        connection.execute('RELEASE job')
+                    results.append((future, result, None))
+            if writes:
+                connection.execute('COMMIT')
+        except sqlite3.Error as e:
+            # BEGIN or COMMIT failed (e.g. the lock stayed busy): nothing in the batch was written
+            logger.error('Storage transaction of %s job(s) failed: %s', len(batch), e)
+            if connection.in_transaction:
+                connection.execute('ROLLBACK')
+            results = [(future, None, wrap_error(e)) for _, _, future in batch]
+
+        elapsed = time.perf_counter() - started
+        self.loop.call_soon_threadsafe(self.finish_batch, results, len(batch), elapsed)
+
+    def finish_batch(self, results, size, elapsed):
+        """Loop thread: record the batch and resolve its futures"""
+        storage_batch_size.observe(size)
+        storage_commit_seconds.observe(elapsed)
+        for future, result, error in results:
+            self.resolve(future, result, error)
+
+    @staticmethod
+    def resolve(future, result, error):
+        if future.cancelled():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    async def submit(self, function, write=True):
+        """Run function(connection) on the storage thread; writes commit before this returns"""
+        if self.thread is None or self.closed:
+            raise StorageError('Storage is not open')
+        future = self.loop.create_future()
+        self.jobs.put((write, function, future))
+        return await future
+
+    # SQL
+
+    async def execute(self, sql, params=()):
+        """Run a write statement; returns the number of rows it changed"""
+        return await self.submit(lambda connection: connection.execute(sql, params).rowcount)
+
+    async def executemany(self, sql, rows):
+        """Run a write statement once per parameter row; returns the number of rows changed"""
+        rows = list(rows)
+        return await self.submit(lambda connection: connection.executemany(sql, rows).rowcount)
+
+    async def fetchone(self, sql, params=()):
+        """First result row as a dict, or None"""
+        def fetch(connection):
+            row = connection.execute(sql, params).fetchone()
+            return dict(row) if row is not None else None
+        return await self.submit(fetch, write=False)
+
+    async def fetchall(self, sql, params=()):
+        """Every result row as a dict"""
+        return await self.submit(
+            lambda connection: [dict(row) for row in connection.execute(sql, params)],
+            write=False
+        )
+
+    # Key/value: JSON values grouped by namespace (usually the cog name)
+
+    async def get(self, namespace, key, default=None):
+        value = await self.get_raw(namespace, key)
+        return json.loads(value) if value is not None else default
+
+    async def set(self, namespace, key, value):
+        await self.set_raw(namespace, key, json.dumps(value))
+
+    async def get_raw(self, namespace, key):
+        """A value's JSON text, undecoded (decode large values off the event loop), or None"""
+        row = await self.fetchone('SELECT value FROM kv WHERE namespace = ? AND key = ?', (namespace, str(key)))
+        return row['value'] if row is not None else None
+
+    async def set_raw(self, namespace, key, value):
+        """Store a value already encoded as JSON text"""
+        await self.execute(
+            'INSERT INTO kv (namespace, key, value, updated_at) VALUES (?, ?, ?, ?) '
+            'ON CONFLICT (namespace, key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at',
+            (namespace, str(key), value, time.time())
+        )
+
+    async def delete(self, namespace, key):
+        """Remove a key; returns whether it existed"""
+        return await self.execute('DELETE FROM kv WHERE namespace = ? AND key = ?', (namespace, str(key))) > 0
+
+    async def items(self, namespace):
+        """Every key in a namespace, as a dict"""
+        rows = await self.fetchall('SELECT key, value FROM kv WHERE namespace = ?', (namespace,))
+        return {row['key']: json.loads(row['value']) for row in rows}
+
+    async def clear(self, namespace):
+        """Remove every key in a namespace; returns how many there were"""
+        return await self.execute('DELETE FROM kv WHERE namespace = ?', (namespace,))
+
+    def table(self, name, columns, key):
+        """A Table helper; call its create() (e.g. in cog_load) before using it"""
+        return Table(self, name, columns, key)
+
+
+class Table:
+    """Rows keyed by one or more columns, read and written as dicts
+
+    columns maps column name -> SQLite type (e.g. {'user_id': 'INTEGER', 'tz': 'TEXT'});
+    key is the primary key column, or a tuple of them.
+    """
+
+    def __init__(self, storage, name, columns, key):
+        self.storage = storage
+        self.name = check_identifier(name)
+        self.columns = {check_identifier(column): kind for column, kind in columns.items()}
+        self.key = tuple(check_identifier(column) for column in ((key,) if isinstance(key, str) else key))
+        self.where_key = ' AND '.join(f'{column} = ?' for column in self.key)
+
+    async def create(self):
+        """Create the table if it doesn't exist"""
+        definitions = ', '.join(f'{column} {kind}' for column, kind in self.columns.items())
+        await self.storage.execute(
+            f'CREATE TABLE IF NOT EXISTS {self.name} ({definitions}, PRIMARY KEY ({", ".join(self.key)}))'
+        )
+
+    async def upsert(self, row):
+        """Insert a row, or update the given columns of the row with the same key"""
+        columns = [check_identifier(column) for column in row]
+        updates = ', '.join(f'{column} = excluded.{column}' for column in columns if column not in self.key)
+        sql = (
+            f'INSERT INTO {self.name} ({", ".join(columns)}) VALUES ({", ".join("?" * len(columns))}) '
+            f'ON CONFLICT ({", ".join(self.key)}) DO ' + (f'UPDATE SET {updates}' if updates else 'NOTHING')
+        )
+        await self.storage.execute(sql, tuple(row.values()))
+
+    async def get(self, *key):
+        """The row with this key, or None"""
+        return await self.storage.fetchone(f'SELECT * FROM {self.name} WHERE {self.where_key}', key)
+
+    async def select(self, where=None, params=()):
+        """Rows matching an optional SQL condition (with ? placeholders)"""
+        sql = f'SELECT * FROM {self.name}' + (f' WHERE {where}' if where else '')
+        return await self.storage.fetchall(sql, params)
+
+    async def delete(self, *key):
+        """Remove the row with this key; returns whether it existed"""
+        return await self.storage.execute(f'DELETE FROM {self.name} WHERE {self.where_key}', key) > 0
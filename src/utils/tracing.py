@@ -0,0 +1,154 @@
+import os
+import re
+import json
+import time
+import random
+import asyncio
+import logging
+import itertools
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Lightweight request tracing. A slash command opens a trace; spans opened while
+# it runs (explicit `with span(...)` blocks and every HTTP request, see
+# utils/http.py) find their parent through a context variable, so they follow
+# the command into awaited coroutines and the tasks it creates. Finished traces
+# are written in the Chrome trace event format, which Perfetto
+# (https://ui.perfetto.dev) and chrome://tracing open directly.
+
+current_span = ContextVar('current_span', default=None)
+
+# Snowflakes and interaction/webhook tokens in URL paths
+SECRET_SEGMENT = re.compile(r'/(?:\d{15,}|[\w.-]{40,})(?=/|$)')
+
+
+class Span:
+    """One timed operation within a trace"""
+
+    __slots__ = ('trace', 'name', 'attributes', 'started_at', 'start', 'duration')
+
+    def __init__(self, trace, name, attributes):
+        self.trace = trace
+        self.name = name
+        self.attributes = attributes
+        self.started_at = time.time_ns() // 1000  # Wall clock in microseconds, for the trace file
+        self.start = time.perf_counter()
+        self.duration = None
+        trace.spans.append(self)
+
+    def finish(self, **attributes):
+        self.attributes.update(attributes)
+        self.duration = time.perf_counter() - self.start
+
+
+class Trace:
+    """Every span recorded while handling one interaction"""
+
+    __slots__ = ('id', 'spans')
+
+    def __init__(self, trace_id):
+        self.id = trace_id
+        self.spans = []
+
+
+class Tracer:
+    """Records traces and writes the sampled ones to a file
+
+    Every trace is kept while it runs, then exported if it won the random sample
+    or took at least slow_threshold seconds, so tail latency is always captured.
+    """
+
+    def __init__(self):
+        self.path = None
+        self.sample_rate = 0.0
+        self.slow_threshold = 0.0
+        self.enabled = False
+        self.ids = itertools.count(1)
+        self.write_lock = threading.Lock()
+        self.logger = logging.getLogger('bot.tracing')
+
+    def configure(self, path, sample_rate, slow_threshold):
+        self.path = path
+        self.sample_rate = sample_rate
+        self.slow_threshold = slow_threshold
+        self.enabled = bool(path) and (sample_rate > 0 or slow_threshold > 0)
+
+    def start_trace(self, name, **attributes):
+        """Open a trace and make its root span current; returns the root span, or None when disabled"""
+        if not self.enabled:
+            return None
+        root = Span(Trace(next(self.ids)), name, attributes)
+        current_span.set(root)
+        return root
+
+    def finish_trace(self, root, **attributes):
+        """Close a trace's root span and export the trace if it was sampled"""
+        if root is None:
+            return
+        root.finish(**attributes)
+        if root.duration >= self.slow_threshold > 0 or random.random() < self.sample_rate:
+            events = [self.to_event(span) for span in root.trace.spans if span.duration is not None]
+            asyncio.get_running_loop().run_in_executor(None, self.write, events)
+
+    @staticmethod
+    def to_event(span):
+        """Chrome trace 'complete' event; each trace gets its own track"""
+        return {
+            'name': span.name,
+            'cat': 'oyasumi',
+            'ph': 'X',
+            'ts': span.started_at,
+            'dur': round(span.duration * 1_000_000),
+            'pid': os.getpid(),
+            'tid': span.trace.id,
+            'args': span.attributes
+        }
+
+    def write(self, events):
+        """Append events to the trace file (runs in an executor thread)
+
+        The file is a JSON array that is never closed, which the trace event
+        format explicitly allows, so appending needs no rewrite.
+        """
+        with self.write_lock:
+            try:
+                with open(self.path, 'a', encoding='utf-8') as trace_file:
+                    if trace_file.tell() == 0:
+                        trace_file.write('[\n')
+                    for event in events:
+                        trace_file.write(json.dumps(event, default=str) + ',\n')
+            except OSError as e:
+                self.logger.warning('Failed to write trace to %s: %s', self.path, e)
+
+
+tracer = Tracer()
+
+
+def start_span(name, **attributes):
+    """Start a child of the current span without making it current; None outside a trace"""
+    parent = current_span.get()
+    if parent is None:
+        return None
+    return Span(parent.trace, name, attributes)
+
+
+@contextmanager
+def span(name, **attributes):
+    """Time a block as a child of the current span; a no-op outside a trace"""
+    child = start_span(name, **attributes)
+    if child is None:
+        yield None
+        return
+
+    token = current_span.set(child)
+    try:
+        yield child
+    finally:
+        current_span.reset(token)
+        child.finish()
+
+
+def describe_request(method, url):
+    """Span name for an HTTP request: method, host and path, without the query or secrets"""
+    return f'{method} {url.host}{SECRET_SEGMENT.sub("/:id", url.path)}'
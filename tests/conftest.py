@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The bot imports its modules relative to src/ (run.py puts it on the path)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
@@ -0,0 +1,50 @@
+from utils.ratelimit import RateLimiter, HARD_LIMIT_FACTOR
+
+
+def hit(limiter, key, rate, per, now):
+    return limiter.hit([(key, rate, per)], now=now)
+
+
+def test_tokens_run_out_and_refill():
+    limiter = RateLimiter()
+    assert hit(limiter, 'a', 2, 10, now=0) == (None, None)
+    assert hit(limiter, 'a', 2, 10, now=0) == (None, None)
+    retry_after, blocked = hit(limiter, 'a', 2, 10, now=0)
+    assert retry_after == 5 and blocked == 0
+    assert hit(limiter, 'a', 2, 10, now=5) == (None, None)
+
+
+def test_rejected_hit_takes_no_tokens():
+    limiter = RateLimiter()
+    hit(limiter, 'global', 1, 10, now=0)
+    retry_after, blocked = limiter.hit([('user', 5, 10), ('global', 1, 10)], now=0)
+    assert blocked == 1
+    assert 'user' not in limiter.buckets
+
+
+def test_refilled_buckets_are_evicted():
+    limiter = RateLimiter(max_buckets=2)
+    for key in 'abc':
+        hit(limiter, key, 5, 1, now=0)
+    hit(limiter, 'd', 5, 1, now=10)  # a, b and c have refilled by now
+    assert len(limiter.buckets) == 2
+    assert list(limiter.buckets) == ['c', 'd']
+
+
+def test_depleted_buckets_are_kept_in_order():
+    limiter = RateLimiter(max_buckets=2)
+    hit(limiter, 'slow', 1, 100, now=0)
+    for key in 'ab':
+        hit(limiter, key, 5, 1, now=0)
+    hit(limiter, 'c', 5, 1, now=10)
+    assert 'slow' in limiter.buckets
+    assert next(iter(limiter.buckets)) == 'slow'  # Still the least recently used
+    assert hit(limiter, 'slow', 1, 100, now=10)[0] == 90
+
+
+def test_flood_of_keys_stays_under_the_hard_limit():
+    limiter = RateLimiter(max_buckets=10)
+    for key in range(1000):
+        hit(limiter, key, 1, 100, now=0)  # Every bucket stays depleted
+    assert len(limiter.buckets) == 10 * HARD_LIMIT_FACTOR
+    assert 999 in limiter.buckets and 0 not in limiter.buckets